@@ -1,8 +1,34 @@
+import os
 import streamlit as st
-from editor import add_course, load_courses_list, load_course_details, edit_course, delete_course
+from editor import (add_course, load_courses_list, load_course_details, edit_course, delete_course, export_courses,
+                    import_courses, read_course_upload)
+from catalog import CSV_FILES, SORT_COLUMNS, catalog_signature, get_catalog
+import profiling
+import search
+from inference import warm_up_status
 from login import logout
-import pandas as pd
-import os
+
+# Upload problems listed before the rest are summarized
+MAX_LISTED_ERRORS = 50
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+def select_core_course(label, course_codes, key):
+    """A selectbox of Core course codes, narrowed and ranked by the search box above it"""
+    query = st.text_input("Search by code, name or description", key=f"{key}_search")
+    if query.strip():
+        matches = search.search(query, ["Core"], limit=None)
+        if not matches:
+            st.info("No courses match the search.")
+            return None
+        course_codes = [course.code for course in matches]
+    catalog = get_catalog()
+
+    def course_label(code):
+        course = catalog.get(code, "Core")
+        return f"{code} - {course.name}" if course and course.name else code
+
+    return st.selectbox(label, course_codes, key=key, format_func=course_label)
 
 def admin_ui():
     # Add logout button at the top
@@ -12,7 +38,8 @@ def admin_ui():
     st.header("Admin Interface - Course Management")
 
     # Radio buttons for selecting action
-    action = st.radio("Select Action", ["Add Course", "Edit Course", "Delete Course", "View All Courses"])
+    action = st.radio("Select Action", ["Add Course", "Edit Course", "Delete Course", "View All Courses",
+                                        "Bulk Import/Export", "Performance"])
 
     if action == "Add Course":
         st.subheader("Add a New Course")
@@ -45,7 +72,9 @@ def admin_ui():
             st.error("No courses available to edit.")
             return
 
-        selected_code = st.selectbox("Select Course to Edit", course_codes)
+        selected_code = select_core_course("Select Course to Edit", course_codes, "edit_course")
+        if selected_code is None:
+            return
         course_details = load_course_details(selected_code)
 
         if course_details:
@@ -79,57 +108,104 @@ def admin_ui():
             st.error("No courses available to delete.")
             return
 
-        selected_code = st.selectbox("Select Course to Delete", course_codes)
+        selected_code = select_core_course("Select Course to Delete", course_codes, "delete_course")
+        if selected_code is None:
+            return
         if st.button("Delete Course"):
             result = delete_course(selected_code)
             st.success(result)
 
     elif action == "View All Courses":
         st.subheader("All Courses")
-        # Define CSV files for all course categories
-        CSV_FILES = {
-            "Core": "courses1.csv",
-            "E1": "E1.csv",
-            "E2": "Elective E2 Courses1.csv",
-            "E3": "Elective E3 Courses1.csv",
-            "E4": "E4.csv",
-            "E5": "E5.csv",
-            "E6": "Elective E6 Courses1.csv",
-            "University Requirement": "University Requirement Courses1.csv",
-            "University Elective": "Elective University Courses1.csv"
-        }
-
-        # Initialize an empty DataFrame to store all courses
-        all_courses_df = pd.DataFrame(columns=[
-            "CourseCode", "CourseName", "Description", "Prerequisites",
-            "CoRequisites", "CreditHours", "SemesterOffered", "Semester", "Category"
-        ])
+        catalog = get_catalog()
+        for category in catalog.missing:
+            st.warning(f"{CSV_FILES[category]} not found for category {category}.")
 
-        # Load and combine data from all CSV files
-        for category, file_path in CSV_FILES.items():
+        table = catalog.course_table()
+        if not len(table):
+            st.error("No course data available to display.")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        categories = col1.multiselect("Category", list(CSV_FILES))
+        semester = col2.selectbox("Semester", ["Any"] + table.semesters)
+        offered = col3.selectbox("Offered In", ["Any", "Fall", "Spring", "Summer"])
+        query = st.text_input("Search code, name or description")
+        col1, col2, col3 = st.columns(3)
+        sort = col1.selectbox("Sort By", SORT_COLUMNS)
+        descending = col2.checkbox("Descending")
+        page_size = col3.selectbox("Rows Per Page", PAGE_SIZES, index=1)
+
+        mask = table.matches(categories, None if semester == "Any" else semester,
+                             None if offered == "Any" else offered, query)
+        total = int(mask.sum())
+        pages = max((total + page_size - 1) // page_size, 1)
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        if total:
+            page_df = table.page(mask, page, page_size, sort, descending)
+            first = (page - 1) * page_size + 1
+            st.caption(f"Showing {first}-{first + len(page_df) - 1} of {total} courses (page {page} of {pages})")
+            st.dataframe(page_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No courses match these filters.")
+
+    elif action == "Bulk Import/Export":
+        st.subheader("Import Courses")
+        upload = st.file_uploader("Course file (CSV or JSON, e.g. csvjson.json)", type=["csv", "json"])
+        replace = st.checkbox("Replace courses that already exist")
+        if upload is not None and st.button("Import Courses"):
             try:
-                if os.path.exists(file_path):
-                    df = pd.read_csv(file_path)
-                    # Ensure all expected columns are present
-                    for col in all_courses_df.columns:
-                        if col not in df.columns:
-                            df[col] = ""  # Add missing columns with empty strings
-                    # Assign category
-                    df["Category"] = category
-                    # Select and reorder columns to match expected structure
-                    df = df[["CourseCode", "CourseName", "Description", "Prerequisites",
-                             "CoRequisites", "CreditHours", "SemesterOffered", "Semester", "Category"]]
-                    all_courses_df = pd.concat([all_courses_df, df], ignore_index=True)
+                courses = read_course_upload(upload.getvalue(), upload.name)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                result = import_courses(courses, replace)
+                errors = result["errors"]
+                if errors:
+                    st.error(f"Nothing was imported: {len(errors)} problems found.")
+                    for error in errors[:MAX_LISTED_ERRORS]:
+                        st.write(f"- {error}")
+                    if len(errors) > MAX_LISTED_ERRORS:
+                        st.write(f"...and {len(errors) - MAX_LISTED_ERRORS} more.")
                 else:
-                    st.warning(f"{file_path} not found for category {category}.")
-            except Exception as e:
-                st.error(f"Error loading {file_path}: {str(e)}")
+                    st.success(f"Imported {len(courses)} courses: {result['added']} added, {result['replaced']} "
+                               f"replaced (validated in {result['validate_ms']:.0f} ms, "
+                               f"written in {result['write_ms']:.0f} ms).")
+
+        st.subheader("Export Courses")
+        export_format = st.radio("Format", ["CSV", "JSON"], horizontal=True)
+        extension = export_format.lower()
+        # Serialized once per catalog version and format, not on every rerun of the page
+        export_key = (catalog_signature(), extension)
+        if st.session_state.get("course_export", (None, None))[0] != export_key:
+            st.session_state.course_export = (export_key, export_courses(extension))
+        st.download_button("Download Courses", st.session_state.course_export[1], file_name=f"courses.{extension}",
+                           mime="application/json" if extension == "json" else "text/csv")
+
+    elif action == "Performance":
+        st.subheader("Recommendation Performance")
+        if "error" in warm_up_status:
+            st.warning(f"Catalog warm-up failed: {warm_up_status['error']}")
+        elif warm_up_status:
+            st.write(f"Catalog warm-up: {warm_up_status['courses']} courses compiled in "
+                     f"{warm_up_status['compile_ms']:.0f} ms, first engine ready in {warm_up_status['engine_ms']:.0f} ms")
+        profiling_on = st.checkbox("Profile recommendation runs in this server", value=profiling.enabled())
+        if profiling_on != profiling.enabled():
+            profiling.enable(profiling_on)
+
+        path = profiling.metrics_path()
+        runs = profiling.load_metrics(path) if path and os.path.exists(path) else profiling.history()
+        st.write(f"{len(runs)} runs recorded" + (f" in {path}" if path else " since the server started"))
+        if not runs:
+            st.info(f"No runs recorded yet. Enable profiling above or set {profiling.PROFILE_ENV_VAR}.")
+            return
 
-        if not all_courses_df.empty:
-            # Display the combined courses in a table
-            st.dataframe(all_courses_df, use_container_width=True)
-        else:
-            st.error("No course data available to display.")
+        st.write("End-to-end latency (ms)")
+        st.dataframe(profiling.latency_percentiles(runs), use_container_width=True)
+        st.write("Per rule, per run: activations, TEST evaluations and milliseconds")
+        st.dataframe(profiling.rule_percentiles(runs), use_container_width=True)
+        st.write("Facts declared and initial agenda size per engine run")
+        st.dataframe(profiling.run_summary(runs), use_container_width=True)
 
 if __name__ == "__main__":
     admin_ui()
\ No newline at end of file
@@ -1,7 +1,9 @@
 import streamlit as st
-import pandas as pd
-from inference import recommend_courses
+from catalog import get_catalog
+from inference import RecommendationSession
 from login import logout
+from planner import DegreePlanner
+import search
 
 def student_ui():
     # Add logout button at the top
@@ -10,28 +12,29 @@ def student_ui():
 
     st.header("Enter Your Information")
 
-    semester = st.number_input("Semester", min_value=1, max_value=12, step=1)
-    cgpa = st.number_input("CGPA", min_value=0.0, max_value=4.0, step=0.1)
-    total_credits = st.number_input("Total Credits Passed", min_value=0, step=1)
-    current_semester = st.selectbox("Current Semester", ["Fall", "Spring"])
+    # Prefill from the logged-in student's record; anything missing keeps the old defaults
+    student = st.session_state.get("user_data") or {}
+    semester_options = ["Fall", "Spring"]
+    semester = st.number_input("Semester", min_value=1, max_value=12, step=1,
+                               value=min(max(student.get("semester") or 1, 1), 12))
+    cgpa = st.number_input("CGPA", min_value=0.0, max_value=4.0, step=0.1,
+                           value=min(max(float(student.get("cgpa") or 0.0), 0.0), 4.0))
+    total_credits = st.number_input("Total Credits Passed", min_value=0, step=1,
+                                    value=max(student.get("total_credits") or 0, 0))
+    current_semester = st.selectbox("Current Semester", semester_options,
+                                    index=semester_options.index(student["current_semester"])
+                                    if student.get("current_semester") in semester_options else 0)
 
     # Load main courses
+    catalog = get_catalog()
     try:
-        courses = pd.read_csv("courses1.csv")
+        core_codes = catalog.codes("Core")
     except FileNotFoundError:
         st.error("courses1.csv not found. Please ensure the file exists.")
         return
 
-    # Define elective course files
-    elective_files = {
-        "E1": "E1.csv",
-        "E2": "Elective E2 Courses1.csv",
-        "E3": "Elective E3 Courses1.csv",
-        "E4": "E4.csv",
-        "E5": "E5.csv",
-        "E6": "Elective E6 Courses1.csv",
-        "University Elective": "Elective University Courses1.csv"
-    }
+    # Elective course categories
+    elective_categories = ["E1", "E2", "E3", "E4", "E5", "E6", "University Elective"]
 
     # Load elective courses based on semester and season
     elective_selections = {}
@@ -39,14 +42,14 @@ def student_ui():
     passed_elective_selections = {}
     if semester == 4 and current_semester == "Fall":
         try:
-            e1_df = pd.read_csv(elective_files["E1"])
+            e1_codes = catalog.codes("E1")
             elective_selections["Elective Course E1"] = st.multiselect(
-                "Elective Course E1", options=e1_df["CourseCode"].tolist(), key="e1_select"
+                "Elective Course E1", options=e1_codes, key="e1_select"
             )
             failed_elective_selections["Failed Elective Course E1"] = st.multiselect(
-                "Failed Elective Course E1", options=e1_df["CourseCode"].tolist(), key="e1_failed_select"
+                "Failed Elective Course E1", options=e1_codes, key="e1_failed_select"
             )
-            available_passed_e1 = list(set(e1_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E1"]))
+            available_passed_e1 = list(set(e1_codes) - set(failed_elective_selections["Failed Elective Course E1"]))
             passed_elective_selections["Passed Elective Course E1"] = st.multiselect(
                 "Passed Elective Course E1", options=available_passed_e1, key="e1_passed_select"
             )
@@ -54,14 +57,14 @@ def student_ui():
             st.error("E1.csv not found. Please ensure the file exists.")
     elif semester == 5 and current_semester == "Spring":
         try:
-            e2_df = pd.read_csv(elective_files["E2"])
+            e2_codes = catalog.codes("E2")
             elective_selections["Elective Course E2"] = st.multiselect(
-                "Elective Course E2", options=e2_df["CourseCode"].tolist(), key="e2_select"
+                "Elective Course E2", options=e2_codes, key="e2_select"
             )
             failed_elective_selections["Failed Elective Course E2"] = st.multiselect(
-                "Failed Elective Course E2", options=e2_df["Code"].tolist(), key="e2_failed_select"
+                "Failed Elective Course E2", options=e2_codes, key="e2_failed_select"
             )
-            available_passed_e2 = list(set(e2_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E2"]))
+            available_passed_e2 = list(set(e2_codes) - set(failed_elective_selections["Failed Elective Course E2"]))
             passed_elective_selections["Passed Elective Course E2"] = st.multiselect(
                 "Passed Elective Course E2", options=available_passed_e2, key="e2_passed_select"
             )
@@ -69,14 +72,14 @@ def student_ui():
             st.error("Elective E2 Courses1.csv not found. Please ensure the file exists.")
     elif semester == 5 and current_semester == "Fall":
         try:
-            uni_df = pd.read_csv(elective_files["University Elective"])
+            uni_codes = catalog.codes("University Elective")
             elective_selections["Elective University"] = st.multiselect(
-                "Elective University", options=uni_df["CourseCode"].tolist(), key="uni_select_5"
+                "Elective University", options=uni_codes, key="uni_select_5"
             )
             failed_elective_selections["Failed Elective University"] = st.multiselect(
-                "Failed Elective University", options=uni_df["CourseCode"].tolist(), key="uni_failed_select_5"
+                "Failed Elective University", options=uni_codes, key="uni_failed_select_5"
             )
-            available_passed_uni = list(set(uni_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective University"]))
+            available_passed_uni = list(set(uni_codes) - set(failed_elective_selections["Failed Elective University"]))
             passed_elective_selections["Passed Elective University"] = st.multiselect(
                 "Passed Elective University", options=available_passed_uni, key="uni_passed_select_5"
             )
@@ -84,14 +87,14 @@ def student_ui():
             st.error("Elective University Courses1.csv not found. Please ensure the file exists.")
     elif semester == 7 and current_semester == "Fall":
         try:
-            uni_df = pd.read_csv(elective_files["University Elective"])
+            uni_codes = catalog.codes("University Elective")
             elective_selections["Elective University"] = st.multiselect(
-                "Elective University", options=uni_df["CourseCode"].tolist(), key="uni_select_7"
+                "Elective University", options=uni_codes, key="uni_select_7"
             )
             failed_elective_selections["Failed Elective University"] = st.multiselect(
-                "Failed Elective University", options=uni_df["CourseCode"].tolist(), key="uni_failed_select_7"
+                "Failed Elective University", options=uni_codes, key="uni_failed_select_7"
             )
-            available_passed_uni = list(set(uni_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective University"]))
+            available_passed_uni = list(set(uni_codes) - set(failed_elective_selections["Failed Elective University"]))
             passed_elective_selections["Passed Elective University"] = st.multiselect(
                 "Passed Elective University", options=available_passed_uni, key="uni_passed_select_7"
             )
@@ -99,25 +102,25 @@ def student_ui():
             st.error("Elective University Courses1.csv not found. Please ensure the file exists.")
     elif semester == 9 and current_semester == "Fall":
         try:
-            e3_df = pd.read_csv(elective_files["E3"])
-            e4_df = pd.read_csv(elective_files["E4"])
+            e3_codes = catalog.codes("E3")
+            e4_codes = catalog.codes("E4")
             elective_selections["Elective Course E3"] = st.multiselect(
-                "Elective Course E3", options=e3_df["CourseCode"].tolist(), key="e3_select"
+                "Elective Course E3", options=e3_codes, key="e3_select"
             )
             failed_elective_selections["Failed Elective Course E3"] = st.multiselect(
-                "Failed Elective Course E3", options=e3_df["CourseCode"].tolist(), key="e3_failed_select"
+                "Failed Elective Course E3", options=e3_codes, key="e3_failed_select"
             )
-            available_passed_e3 = list(set(e3_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E3"]))
+            available_passed_e3 = list(set(e3_codes) - set(failed_elective_selections["Failed Elective Course E3"]))
             passed_elective_selections["Passed Elective Course E3"] = st.multiselect(
                 "Passed Elective Course E3", options=available_passed_e3, key="e3_passed_select"
             )
             elective_selections["Elective Course E4"] = st.multiselect(
-                "Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_select"
+                "Elective Course E4", options=e4_codes, key="e4_select"
             )
             failed_elective_selections["Failed Elective Course E4"] = st.multiselect(
-                "Failed Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_failed_select"
+                "Failed Elective Course E4", options=e4_codes, key="e4_failed_select"
             )
-            available_passed_e4 = list(set(e4_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E4"]))
+            available_passed_e4 = list(set(e4_codes) - set(failed_elective_selections["Failed Elective Course E4"]))
             passed_elective_selections["Passed Elective Course E4"] = st.multiselect(
                 "Passed Elective Course E4", options=available_passed_e4, key="e4_passed_select"
             )
@@ -125,37 +128,50 @@ def student_ui():
             st.error(f"{str(e).split(': ')[1]} not found. Please ensure the file exists.")
     elif semester == 10:
         try:
-            e4_df = pd.read_csv(elective_files["E4"])
-            e6_df = pd.read_csv(elective_files["E6"])
+            e4_codes = catalog.codes("E4")
+            e6_codes = catalog.codes("E6")
             elective_selections["Elective Course E4"] = st.multiselect(
-                "Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_select_10"
+                "Elective Course E4", options=e4_codes, key="e4_select_10"
             )
             failed_elective_selections["Failed Elective Course E4"] = st.multiselect(
-                "Failed Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_failed_select_10"
+                "Failed Elective Course E4", options=e4_codes, key="e4_failed_select_10"
             )
-            available_passed_e4 = list(set(e4_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E4"]))
+            available_passed_e4 = list(set(e4_codes) - set(failed_elective_selections["Failed Elective Course E4"]))
             passed_elective_selections["Passed Elective Course E4"] = st.multiselect(
                 "Passed Elective Course E4", options=available_passed_e4, key="e4_passed_select_10"
             )
             elective_selections["Elective Course E6"] = st.multiselect(
-                "Elective Course E6", options=e6_df["CourseCode"].tolist(), key="e6_select"
+                "Elective Course E6", options=e6_codes, key="e6_select"
             )
             failed_elective_selections["Failed Elective Course E6"] = st.multiselect(
-                "Failed Elective Course E6", options=e6_df["CourseCode"].tolist(), key="e6_failed_select"
+                "Failed Elective Course E6", options=e6_codes, key="e6_failed_select"
             )
-            available_passed_e6 = list(set(e6_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E6"]))
+            available_passed_e6 = list(set(e6_codes) - set(failed_elective_selections["Failed Elective Course E6"]))
             passed_elective_selections["Passed Elective Course E6"] = st.multiselect(
                 "Passed Elective Course E6", options=available_passed_e6, key="e6_passed_select"
             )
         except FileNotFoundError as e:
             st.error(f"{str(e).split(': ')[1]} not found. Please ensure the file exists.")
 
+    # Find electives by topic across every elective category
+    with st.expander("Search Elective Courses"):
+        query = st.text_input("Search by code, name or description", key="elective_search")
+        if query.strip():
+            matches = search.search(query, elective_categories)
+            if matches:
+                for course in matches:
+                    st.write(f"{course.code} - {course.name} ({course.file_category}, "
+                             f"{course.credit_hours:g} credit hours)")
+                    if course.description:
+                        st.caption(course.description)
+            else:
+                st.write("No elective courses match the search.")
+
     # Load all courses for failed/passed selection
-    all_courses = courses["CourseCode"].tolist()
-    for cat, file_path in elective_files.items():
+    all_courses = list(core_codes)
+    for cat in elective_categories:
         try:
-            df = pd.read_csv(file_path)
-            all_courses.extend(df["CourseCode"].tolist())
+            all_courses.extend(catalog.codes(cat))
         except FileNotFoundError:
             continue
 
@@ -165,7 +181,10 @@ def student_ui():
     # Failed and Passed courses selection for core courses
     failed_courses = st.multiselect("Failed Core Courses", options=all_courses, key="failed_core")
     available_passed = list(set(all_courses) - set(failed_courses))
-    passed_courses = st.multiselect("Passed Core Courses", options=available_passed, key="passed_core")
+    # Registered courses count as passed, as in batch advising
+    registered = [code for code in student.get("registered_courses", []) if code in available_passed]
+    passed_courses = st.multiselect("Passed Core Courses", options=available_passed, default=registered,
+                                    key="passed_core")
 
     if st.button("Get Recommendations"):
         # Combine selected elective courses and failed elective courses with failed core courses
@@ -179,9 +198,12 @@ def student_ui():
         for passed_label, passed_codes in passed_elective_selections.items():
             passed_electives.extend(passed_codes)
 
-        # Pass all selected courses to the recommender
+        # Pass all selected courses to the recommender; the session re-fires only what a changed selection affects
+        if "recommendation_session" not in st.session_state:
+            # The fast engine is the one that updates incrementally; its results match experta's
+            st.session_state.recommendation_session = RecommendationSession(fast=True)
         try:
-            recs, elective_opts, exps = recommend_courses(
+            recs, elective_opts, exps = st.session_state.recommendation_session.recommend(
                 semester=semester,
                 cgpa=cgpa,
                 passed_courses=passed_courses + passed_electives,
@@ -193,7 +215,14 @@ def student_ui():
             st.subheader("Recommended Courses")
             if recs:
                 for i, course in enumerate(recs):
-                    st.write(f"{i}: {course}")
+                    st.write(f"{i}: {course['code']} - {course['name']} ({course['credit_hours']:g} credit hours): {course['reason']}")
+            else:
+                st.write("[]")
+
+            st.subheader("Elective Options")
+            if elective_opts:
+                for code, options in elective_opts.items():
+                    st.write(f"{code}: {', '.join(options) if options else 'No eligible courses'}")
             else:
                 st.write("[]")
 
@@ -205,20 +234,26 @@ def student_ui():
                 st.write("[]")
 
             st.subheader("Total Recommended Credit Hours")
-            total_hours = sum(courses[courses["CourseCode"] == code]["CreditHours"].iloc[0]
-                              for code in recs
-                              if code in courses["CourseCode"].values)
-            for cat, file_path in elective_files.items():
-                try:
-                    df = pd.read_csv(file_path)
-                    total_hours += sum(df[df["CourseCode"] == code]["Credit Hours"].iloc[0]
-                                       for code in recs
-                                       if code in df["CourseCode"].values)
-                except FileNotFoundError:
-                    continue
-            st.write(total_hours)
+            st.write(f"{sum(course['credit_hours'] for course in recs):g}")
 
         except ValueError as e:
             st.error(f"Error: {str(e)}")
         except Exception as e:
-            st.error(f"An unexpected error occurred: {str(e)}")
\ No newline at end of file
+            st.error(f"An unexpected error occurred: {str(e)}")
+
+    if st.button("Plan to Graduation"):
+        passed_electives = [code for codes in passed_elective_selections.values() for code in codes]
+        try:
+            plan = DegreePlanner().plan(semester, current_semester, cgpa, passed_courses + passed_electives,
+                                        total_credits=total_credits, time_budget=2.0)
+            st.subheader("Plan to Graduation")
+            if not plan.feasible:
+                st.error(f"No plan can complete: {', '.join(plan.unreachable)}")
+            else:
+                for term in plan.terms:
+                    st.write(f"Semester {term['semester']} ({term['season']}, {term['credits']:g} credit hours): "
+                             f"{', '.join(term['courses']) or 'No courses offered'}")
+                if not plan.optimal:
+                    st.info("Best plan found within the time limit; a shorter one may exist.")
+        except (FileNotFoundError, ValueError) as e:
+            st.error(f"Error: {str(e)}")
@@ -0,0 +1,121 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+
+from inference import recommend_courses, warm_up
+from students import parse_registered_courses
+
+OUTPUT_FIELDS = ["id", "name", "recommendations", "elective_options", "explanations", "error"]
+
+def load_students(path):
+    """Read students.csv into the keyword arguments recommend_courses expects
+
+    A row that does not parse is yielded with an error instead, for advise_student to report, so one
+    bad row does not stop the batch.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            student = {"id": row.get("id") or "", "name": row.get("name") or ""}
+            try:
+                student.update(
+                    semester=int(row["semester"]),
+                    cgpa=float(row["cgpa"]),
+                    passed_courses=parse_registered_courses(row.get("registered_courses")),
+                    failed_courses=[],
+                    total_credits=int(float(row["total_credits"])),
+                    current_semester=row["current_semester"]
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                student["error"] = f"Invalid student record: {e}"
+            yield student
+
+def directory_student(student):
+    """A student directory record as advise_student input, with registered courses counted as passed"""
+    return {
+        "id": student["id"],
+        "name": student["name"],
+        "semester": student["semester"],
+        "cgpa": student["cgpa"],
+        "passed_courses": student["registered_courses"],
+        "failed_courses": [],
+        "total_credits": student["total_credits"],
+        "current_semester": student["current_semester"]
+    }
+
+def advise_student(student):
+    """Run the recommender for one student; errors are reported per student instead of aborting the batch"""
+    result = {"id": student["id"], "name": student["name"],
+              "recommendations": [], "elective_options": {}, "explanations": [], "error": ""}
+    if student.get("error"):
+        result["error"] = student["error"]
+        return result
+    try:
+        recs, elective_opts, exps = recommend_courses(
+            semester=student["semester"],
+            cgpa=student["cgpa"],
+            passed_courses=student["passed_courses"],
+            failed_courses=student["failed_courses"],
+            total_credits=student["total_credits"],
+            current_semester=student["current_semester"]
+        )
+        result.update(recommendations=recs, elective_options=elective_opts, explanations=exps)
+    except (ValueError, FileNotFoundError) as e:
+        result["error"] = str(e)
+    return result
+
+def warm_worker():
+    """Build one engine per worker up front so the first student does not pay for it"""
+    try:
+        warm_up()
+    except (FileNotFoundError, ValueError):
+        pass  # Each student reports the problem instead; a failing initializer would be respawned forever
+
+def advise_all(students, workers=None, chunksize=8):
+    """Yield one result per student as soon as it finishes, fanning out over a process pool"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for student in students:
+            yield advise_student(student)
+        return
+    with multiprocessing.Pool(workers, initializer=warm_worker) as pool:
+        yield from pool.imap_unordered(advise_student, students, chunksize=chunksize)
+
+def write_jsonl(results, f):
+    count = 0
+    for result in results:
+        f.write(json.dumps(result) + "\n")
+        f.flush()
+        count += 1
+    return count
+
+def write_csv(results, f):
+    writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+    writer.writeheader()
+    count = 0
+    for result in results:
+        writer.writerow({
+            **result,
+            "recommendations": ";".join(result["recommendations"]),
+            "elective_options": json.dumps(result["elective_options"]),
+            "explanations": " | ".join(result["explanations"])
+        })
+        f.flush()
+        count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute course recommendations for every student.")
+    parser.add_argument("--students", default="students.csv", help="Students CSV (default: students.csv)")
+    parser.add_argument("--output", default="recommendations.jsonl", help="Output file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    writer = write_csv if args.output.endswith(".csv") else write_jsonl
+    with open(args.output, "w", newline='', encoding='utf-8') as f:
+        count = writer(advise_all(load_students(args.students), workers=args.workers), f)
+    print(f"Wrote recommendations for {count} students to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import database
+import editor
+import students
+import inference
+import search
+from catalog import COLUMNS, CSV_FILES, DB_ENV_VAR, SORT_COLUMNS, get_catalog, reload_catalog, to_record
+from snapshot import SNAPSHOT_FILE
+from inference import (RESULT_CACHE_SIZE, CourseRecommender, RecommendationSession, Student, get_compiled_catalog,
+                       recommend_courses)
+
+# Same profile as the example in inference.py
+SAMPLE_STUDENT = {
+    "semester": 2,
+    "cgpa": 3.7,
+    "passed_courses": ["MEC011", "PHY212", "CSE014", "UC11XX", "MAT123", "MAT112", "MAT131", "CSE315"],
+    "failed_courses": ["CSE015"],
+    "total_credits": 30,
+    "current_semester": "Fall"
+}
+
+def recommend_with_fresh_engine(semester, cgpa, passed_courses, failed_courses, total_credits, current_semester):
+    """The original request path: build, reset and load a new engine for every call"""
+    engine = CourseRecommender()
+    engine.reset()
+    engine.declare(Student(
+        semester=semester,
+        cgpa=cgpa,
+        passed=set(passed_courses),
+        failed=set(failed_courses),
+        credits=total_credits,
+        current_semester=current_semester
+    ))
+    engine.run()
+    return engine.get_recommendations()
+
+def time_calls(func, runs, **kwargs):
+    """Return per-call latencies in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(**kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def time_each(func, calls):
+    """Per-call latencies in milliseconds for a list of argument tuples"""
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def summarize(label, timings):
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    print(f"{label:<24} mean {statistics.mean(timings):8.3f} ms   "
+          f"median {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+def benchmark_engine(runs=200):
+    result_cache = get_compiled_catalog().result_cache
+    result_cache.maxsize = 0  # measure the engine itself first
+    recommend_courses(**SAMPLE_STUDENT)  # warm the engine pool
+    summarize("fresh engine", time_calls(recommend_with_fresh_engine, runs, **SAMPLE_STUDENT))
+    summarize("pooled engine", time_calls(recommend_courses, runs, **SAMPLE_STUDENT))
+    summarize("fast path", time_calls(recommend_courses, runs, fast=True, **SAMPLE_STUDENT))
+    result_cache.maxsize = RESULT_CACHE_SIZE
+    summarize("cached profile", time_calls(recommend_courses, runs, **SAMPLE_STUDENT))
+
+# Run in a fresh interpreter: argv[1] is "warm" to call inference.warm_up before the first request
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+import inference
+if sys.argv[1] == "warm":
+    inference.warm_up()
+warmed = time.perf_counter()
+inference.recommend_courses(**json.loads(sys.argv[2]))
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "warm_up_ms": (warmed - imported) * 1000,
+                  "first_request_ms": (done - warmed) * 1000}))
+"""
+
+def benchmark_startup(runs=5):
+    """Time importing the app and its first recommendation in fresh interpreters, with and without warm-up"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for mode in ["cold", "warm"]:
+        results = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, mode, json.dumps(SAMPLE_STUDENT)],
+                                    cwd=directory, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+        summarize(f"{mode} import main", [result["import_ms"] for result in results])
+        if mode == "warm":
+            summarize("warm-up", [result["warm_up_ms"] for result in results])
+        summarize(f"{mode} first request", [result["first_request_ms"] for result in results])
+
+def write_synthetic_files(course_count, student_count):
+    """Core catalog and students.csv of the given sizes in the current directory"""
+    with open("courses1.csv", "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(course_count):
+            writer.writerow([f"C{i:05d}", f"Course {i}", "Synthetic course", f"C{i - 1:05d}" if i % 3 else "", "",
+                             3, random.choice(["Fall", "Spring", "Both"]), i % 10 + 1, "Core"])
+    with open("students.csv", "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "semester", "current_semester", "year", "cgpa", "total_credits",
+                         "registered_courses"])
+        for i in range(student_count):
+            writer.writerow([1000000 + i, f"Student {i}", i % 10 + 1, "Fall", 2024, 3.0, 30, "C00001;C00002"])
+
+def login_lookup_csv(student_id):
+    """The lookup LoginPage.load_student_data does against students.csv"""
+    students_df = pd.read_csv("students.csv")
+    return students_df[students_df["id"] == int(student_id)]
+
+def benchmark_storage(course_count=10000, student_count=100000, lookups=200, writes=50):
+    """Lookup and write latency of the CSV files against the SQLite store"""
+    cwd = os.getcwd()
+    os.environ.pop(DB_ENV_VAR, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            write_synthetic_files(course_count, student_count)
+            db_file = os.path.join(tmp, "bench.db")
+            start = time.perf_counter()
+            database.import_files(db_file)
+            print(f"{course_count} courses, {student_count} students; "
+                  f"SQLite import {(time.perf_counter() - start) * 1000:.0f} ms")
+
+            codes = [(f"C{random.randrange(course_count):05d}",) for _ in range(lookups)]
+            ids = [(1000000 + random.randrange(student_count),) for _ in range(lookups // 10)]
+            summarize("csv course lookup", time_each(editor.load_course_details, codes))
+            summarize("sqlite course lookup", time_each(lambda code: database.get_course(code, "Core", db_file), codes))
+            summarize("csv student lookup", time_each(login_lookup_csv, ids))
+            start = time.perf_counter()
+            directory = students.load_directory("students.csv")
+            print(f"student directory load {(time.perf_counter() - start) * 1000:.0f} ms")
+            summarize("directory student lookup", time_each(directory.get, ids))
+            summarize("sqlite student lookup", time_each(lambda student_id: database.get_student(student_id, db_file), ids))
+
+            edits = [(code, "Renamed", "", "", "", 3, "Fall", 1, "Core") for code, in codes[:writes]]
+            summarize("csv course edit", time_each(editor.edit_course, edits))
+            summarize("sqlite course edit", time_each(
+                lambda code, *_: database.update_course(code, "Core", {"CourseName": "Renamed"}, db_file), edits))
+            adds = [(f"N{i:05d}", "New", "", "", "", 3, "Fall", 1, "Core") for i in range(writes)]
+            summarize("csv course add", time_each(editor.add_course, adds))
+            summarize("sqlite course add", time_each(
+                lambda code, *_: database.add_course("Core", {"CourseCode": code, "CourseName": "New"}, db_file), adds))
+            editor.compact_pending()
+        finally:
+            os.chdir(cwd)
+
+def bulk_upload(row_count, categories, rng):
+    """A CSV upload of new courses spread over the categories, with prerequisites on earlier rows"""
+    rows = []
+    for i in range(row_count):
+        prereqs = [rows[rng.randrange(i)]["CourseCode"] for _ in range(rng.randint(0, 2))] if i else []
+        rows.append({"CourseCode": f"B{i:05d}", "CourseName": f"Bulk course {i}", "Description": "",
+                     "Prerequisites": ",".join(dict.fromkeys(prereqs)), "CoRequisites": "",
+                     "CreditHours": rng.choice([2, 3, 4]), "SemesterOffered": rng.choice(["Fall", "Spring", "Both"]),
+                     "Semester": rng.randint(1, 10), "Category": categories[i % len(categories)]})
+    return pd.DataFrame(rows).to_csv(index=False).encode("utf-8")
+
+def benchmark_bulk(row_count=10000, single_adds=100, seed=0):
+    """Bulk import and export of a row_count-course upload against adding courses one at a time"""
+    rng = random.Random(seed)
+    cwd = os.getcwd()
+    os.environ.pop(DB_ENV_VAR, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            write_synthetic_catalog(1000, rng)
+            reload_catalog()
+            data = bulk_upload(row_count, list(CSV_FILES), rng)
+            start = time.perf_counter()
+            upload = editor.read_course_upload(data, "upload.csv")
+            parsed = time.perf_counter()
+            result = editor.import_courses(upload)
+            if result["errors"]:
+                raise ValueError(f"Upload rejected: {result['errors'][:3]}")
+            print(f"{row_count}-row upload: parse {(parsed - start) * 1000:.0f} ms, "
+                  f"validate {result['validate_ms']:.0f} ms, write {result['write_ms']:.0f} ms, "
+                  f"total {(time.perf_counter() - start) * 1000:.0f} ms")
+            reload_catalog()
+            course_count = len(get_catalog().all_courses())  # Load outside the timings
+            for fmt in ["csv", "json"]:
+                start = time.perf_counter()
+                exported = editor.export_courses(fmt)
+                print(f"{fmt} export of {course_count} courses: "
+                      f"{(time.perf_counter() - start) * 1000:.0f} ms, {len(exported) / 2 ** 20:.1f} MB")
+            adds = [(f"S{i:05d}", "Single", "", "", "", 3, "Fall", 1, "Core") for i in range(single_adds)]
+            timings = time_each(editor.add_course, adds)
+            print(f"add_course one at a time: {statistics.mean(timings):.1f} ms per course, "
+                  f"{statistics.mean(timings) * row_count / 1000:.1f} s projected for {row_count}")
+            editor.compact_pending()
+        finally:
+            os.chdir(cwd)
+            reload_catalog()
+
+def benchmark_browse(course_count=10000, queries=200, seed=0):
+    """Building the whole course table, as View All Courses did, against filtered, sorted pages"""
+    rng = random.Random(seed)
+    cwd = os.getcwd()
+    os.environ.pop(DB_ENV_VAR, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            write_synthetic_catalog(course_count, rng)
+            reload_catalog()
+            catalog = get_catalog()
+            summarize("all_courses", time_calls(catalog.all_courses, 20))
+            start = time.perf_counter()
+            table = catalog.course_table()
+            print(f"course table of {len(table)} courses built in {(time.perf_counter() - start) * 1000:.0f} ms")
+            calls = []
+            for _ in range(queries):
+                filters = (rng.sample(list(CSV_FILES), rng.randint(0, 2)), rng.choice([None] + table.semesters),
+                           rng.choice([None, "Fall", "Spring"]), rng.choice(["", "", "core", "elective 1"]))
+                calls.append((filters, rng.randint(1, 3), rng.choice(SORT_COLUMNS), rng.random() < 0.5))
+            for sort in SORT_COLUMNS:
+                table.order(sort), table.order(sort, True)  # Sort orders are built once per catalog
+            summarize("filtered page", time_each(
+                lambda filters, page, sort, descending: table.page(table.matches(*filters), page, 50, sort, descending),
+                calls))
+        finally:
+            os.chdir(cwd)
+            reload_catalog()
+
+def benchmark_search(course_count=10000, queries=200, updates=50, seed=0):
+    """Course search: building the index, ranked queries, and edits applied to it against rebuilding it"""
+    rng = random.Random(seed)
+    cwd = os.getcwd()
+    os.environ.pop(DB_ENV_VAR, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            write_synthetic_catalog(course_count, rng)
+            reload_catalog()
+            records = [record for records in get_catalog().records.values() for record in records]
+            start = time.perf_counter()
+            index = search.CourseIndex(records)
+            print(f"index of {len(records)} courses built in {(time.perf_counter() - start) * 1000:.0f} ms")
+            words = ["core", "course", "elective", "c0", "c05", "e3", f"{rng.randrange(course_count)}"]
+            calls = [(" ".join(rng.sample(words, rng.randint(1, 2))),) for _ in range(queries)]
+            summarize("ranked search", time_each(index.search, calls))
+            edits = [(record._replace(name=f"Renamed {record.name}", description=f"Searchable text {n}"),)
+                     for n, record in enumerate(rng.sample(records, updates))]
+            summarize("index update", time_each(index.add, edits))
+            summarize("index rebuild", time_calls(lambda: search.CourseIndex(records), 5))
+        finally:
+            os.chdir(cwd)
+            reload_catalog()
+
+# Default file the suite appends its results to, one JSON object per scale and run
+RESULTS_FILE = "benchmark_results.jsonl"
+
+SEMESTERS = 10
+ELECTIVE_CATEGORIES = ["E1", "E2", "E3", "E4", "E5", "E6"]
+
+def write_synthetic_catalog(course_count, rng):
+    """Every category file with about course_count courses in total, in the current directory
+
+    Core courses are spread over SEMESTERS levels and take up to two prerequisites from the
+    level before and one from further back, giving chains as deep as the real degree. A
+    tenth of the courses are electives, split over E1-E6, each with a slot row in courses1.csv.
+    Returns the Core courses per level, for generating students.
+    """
+    elective_count = max(course_count // 10, len(ELECTIVE_CATEGORIES))
+    core_count = max(course_count - elective_count - 4, SEMESTERS)
+    by_level = {level: [] for level in range(1, SEMESTERS + 1)}
+    core_rows = []
+    for i in range(core_count):
+        level = i * SEMESTERS // core_count + 1
+        code = f"C{level:02d}{i:05d}"
+        prereqs = rng.sample(by_level[level - 1], min(len(by_level[level - 1]), rng.randint(0, 2))) if level > 1 else []
+        earlier = [c for lvl in range(1, level - 1) for c in by_level[lvl][-20:]]
+        if earlier and rng.random() < 0.3:
+            prereqs.append(rng.choice(earlier))
+        core_rows.append([code, f"Core course {i}", "", ",".join(prereqs), "", rng.choice([2, 3, 3, 3, 4]),
+                          rng.choice(["Fall", "Spring", "Both"]), level, "Core"])
+        by_level[level].append(code)
+    for n, cat in enumerate(ELECTIVE_CATEGORIES):
+        core_rows.append([f"{cat}SLOT", f"{cat} elective", "", "", "", 3, "Both", 4 + n, cat])
+    core_rows += [["CSE011", "Orientation", "", "", "", 0, "Fall", 1, "University Requirement"],
+                  ["LAN022", "Language", "", "", "", 0, "Fall", 2, "University Requirement"]]
+    files = {"Core": core_rows}
+    for n in range(elective_count):
+        cat = ELECTIVE_CATEGORIES[n % len(ELECTIVE_CATEGORIES)]
+        prereqs = rng.sample(by_level[3], 1) if by_level[3] and rng.random() < 0.5 else []
+        files.setdefault(cat, []).append([f"{cat}X{n:05d}", f"{cat} course {n}", "", ",".join(prereqs), "",
+                                          rng.choice([2, 3]), "Both", "", cat])
+    files["University Requirement"] = [["UNR101", "University course", "", "", "", 2, "Both", 1,
+                                        "University Requirement"]]
+    files["University Elective"] = [["UNE101", "University elective", "", "", "", 2, "Both", "",
+                                     "University Elective"]]
+    for category, filename in CSV_FILES.items():
+        with open(filename, "w", newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(files.get(category, []))
+    return by_level
+
+def generate_students(by_level, count, rng):
+    """Students who passed most courses below their level and failed a few"""
+    students = []
+    for _ in range(count):
+        semester = rng.randint(1, SEMESTERS)
+        below = [code for level in range(1, semester) for code in by_level[level]]
+        passed = [code for code in below if rng.random() < 0.9]
+        failed = rng.sample([code for code in below if code not in passed], min(2, len(below) - len(passed)))
+        students.append({
+            "semester": semester,
+            "cgpa": round(rng.uniform(1.0, 4.0), 2),
+            "passed_courses": passed,
+            "failed_courses": failed,
+            "total_credits": 3 * len(passed),
+            "current_semester": rng.choice(["Fall", "Spring"])
+        })
+    return students
+
+def load_compiled_catalog():
+    """Read the catalog files and compile them, as the first request after a change does"""
+    reload_catalog()
+    inference._compiled = None
+    if os.path.exists(SNAPSHOT_FILE):
+        os.remove(SNAPSHOT_FILE)
+    start = time.perf_counter()
+    catalog = get_catalog()
+    loaded = time.perf_counter()
+    compiled = get_compiled_catalog()
+    compiled_at = time.perf_counter()
+    with compiled.engine_pool.engine():
+        pass
+    return {"courses": sum(len(records) for records in catalog.records.values()),
+            "load_ms": (loaded - start) * 1000,
+            "compile_ms": (compiled_at - loaded) * 1000,
+            "warm_up_ms": (time.perf_counter() - compiled_at) * 1000}
+
+def load_snapshot():
+    """Milliseconds to restore the compiled catalog from the snapshot load_compiled_catalog wrote, as a new
+    process does"""
+    inference._snapshot_thread.join()
+    reload_catalog()
+    inference._compiled = None
+    start = time.perf_counter()
+    compiled = get_compiled_catalog()
+    elapsed = (time.perf_counter() - start) * 1000
+    if compiled.catalog.compiled is not compiled:
+        raise RuntimeError(f"{SNAPSHOT_FILE} was not used")
+    return elapsed
+
+def measure_memory():
+    """Peak Python allocations while loading, compiling and warming one engine, in MB"""
+    tracemalloc.start()
+    try:
+        load_compiled_catalog()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def measure_engine(students, fast):
+    get_compiled_catalog().result_cache.maxsize = 0  # every student runs the rules
+    timings = []
+    start = time.perf_counter()
+    for student in students:
+        call_start = time.perf_counter()
+        recommend_courses(fast=fast, **student)
+        timings.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {"mean_ms": statistics.mean(timings), "p50_ms": statistics.median(timings),
+            "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)],
+            "throughput_per_s": len(students) / elapsed}
+
+def measure_whatif(students, rng, changes=5):
+    """Latency of toggling one passed course in a fast-engine RecommendationSession"""
+    timings = []
+    refired = []
+    for student in students:
+        session = RecommendationSession(fast=True)
+        session.recommend(**student)
+        passed = list(student["passed_courses"])
+        for _ in range(changes):
+            code = rng.choice(passed or student["failed_courses"] or ["NONE"])
+            toggled = [c for c in student["passed_courses"] if c != code]
+            if len(toggled) == len(student["passed_courses"]):
+                toggled.append(code)
+            student = dict(student, passed_courses=toggled)
+            call_start = time.perf_counter()
+            session.recommend(**student)
+            timings.append((time.perf_counter() - call_start) * 1000)
+            refired.append(session.refired)
+    timings.sort()
+    return {"mean_ms": statistics.mean(timings), "p50_ms": statistics.median(timings),
+            "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)], "refired": statistics.mean(refired)}
+
+def retained_memory(func):
+    """func's result and the Python memory still allocated once it returns, in MB"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        return result, tracemalloc.get_traced_memory()[0] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def request_allocations(students, fast):
+    """Mean peak Python allocation of one uncached recommendation, in KB"""
+    get_compiled_catalog().result_cache.maxsize = 0
+    recommend_courses(fast=fast, **students[0])  # warm the engine pool
+    peaks = []
+    tracemalloc.start()
+    try:
+        for student in students:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            recommend_courses(fast=fast, **student)
+            peaks.append((tracemalloc.get_traced_memory()[1] - before) / 2 ** 10)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks)
+
+def benchmark_memory(scales, student_count, profiles=20, seed=0):
+    """Memory held by the catalog, its course records, the compiled catalog and the student
+    directory at each synthetic catalog size, and the allocations of one recommendation"""
+    cwd = os.getcwd()
+    os.environ.pop(DB_ENV_VAR, None)
+    for scale in scales:
+        rng = random.Random(seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                by_level = write_synthetic_catalog(scale, rng)
+                population = generate_students(by_level, profiles, rng)
+                with open("students.csv", "w", newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["id", "name", "semester", "current_semester", "year", "cgpa", "total_credits",
+                                     "registered_courses"])
+                    for i in range(student_count):
+                        student = population[i % profiles]
+                        writer.writerow([1000000 + i, f"Student {i}", student["semester"],
+                                         student["current_semester"], 2024, student["cgpa"],
+                                         student["total_credits"], ";".join(student["passed_courses"])])
+                reload_catalog()
+                inference._compiled = None
+                catalog, catalog_mb = retained_memory(get_catalog)
+                frames = catalog.frames
+                records, records_mb = retained_memory(lambda: [
+                    to_record(row, category) for category, df in frames.items() for _, row in df.iterrows()])
+                _, compiled_mb = retained_memory(inference.warm_up)
+                directory, directory_mb = retained_memory(lambda: students.load_directory("students.csv"))
+                print(f"{scale:>6} courses: catalog {catalog_mb:.1f} MB, records {records_mb:.2f} MB "
+                      f"({records_mb * 2 ** 20 / len(records):.0f} B/course), compiled {compiled_mb:.1f} MB, "
+                      f"{len(directory)} students {directory_mb:.1f} MB")
+                for engine in ["experta", "fast"]:
+                    allocated = request_allocations(population, fast=engine == "fast")
+                    print(f"{'':>8}{engine:<8} {allocated:8.1f} KB allocated per request")
+            finally:
+                os.chdir(cwd)
+                reload_catalog()
+                inference._compiled = None
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+def benchmark_scale(course_count, student_count, engines, seed=0):
+    """Catalog load, memory and recommendation latency for one synthetic catalog size"""
+    rng = random.Random(seed)
+    cwd = os.getcwd()
+    os.environ.pop(DB_ENV_VAR, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            by_level = write_synthetic_catalog(course_count, rng)
+            students = generate_students(by_level, student_count, rng)
+            result = {"scale": course_count, "students": student_count, **load_compiled_catalog(),
+                      "snapshot_ms": load_snapshot(), "memory_mb": measure_memory()}
+            for engine in engines:
+                result[engine] = measure_engine(students, fast=engine == "fast")
+            if "fast" in engines:
+                result["whatif"] = measure_whatif(students, rng)
+        finally:
+            os.chdir(cwd)
+            reload_catalog()
+            inference._compiled = None
+    return result
+
+def print_result(result):
+    print(f"{result['scale']:>6} courses ({result['courses']} loaded): load {result['load_ms']:.0f} ms, "
+          f"compile {result['compile_ms']:.0f} ms, snapshot {result.get('snapshot_ms', 0):.0f} ms, "
+          f"warm-up {result['warm_up_ms']:.0f} ms, "
+          f"peak memory {result['memory_mb']:.1f} MB")
+    for engine in ["experta", "fast"]:
+        if engine in result:
+            stats = result[engine]
+            print(f"{'':>8}{engine:<8} p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms   "
+                  f"{stats['throughput_per_s']:8.1f} students/s")
+    if "whatif" in result:
+        stats = result["whatif"]
+        print(f"{'':>8}{'what-if':<8} p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms   "
+              f"{stats['refired']:8.1f} activations re-fired")
+
+def regressions(result, previous, tolerance):
+    """Metrics that got worse than the previous result for the same scale by more than tolerance"""
+    worse = []
+    for metric in ["load_ms", "compile_ms", "snapshot_ms", "warm_up_ms", "memory_mb"]:
+        if previous.get(metric) and result[metric] > previous[metric] * (1 + tolerance):
+            worse.append(f"{metric} {previous[metric]:.1f} -> {result[metric]:.1f}")
+    for engine in ["experta", "fast", "whatif"]:
+        if engine in result and engine in previous:
+            old, new = previous[engine]["p50_ms"], result[engine]["p50_ms"]
+            if new > old * (1 + tolerance):
+                worse.append(f"{engine} p50 {old:.2f} -> {new:.2f} ms")
+    return worse
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def benchmark_suite(scales, student_count, engines, output, tolerance):
+    """Run every scale, append the results to output and report regressions against its last run per scale"""
+    previous = {}
+    for result in load_results(output):
+        previous[result["scale"]] = result
+    commit = git_commit()
+    found = []
+    with open(output, "a", encoding='utf-8') as f:
+        for scale in scales:
+            result = benchmark_scale(scale, student_count, engines)
+            result.update(time=time.strftime("%Y-%m-%dT%H:%M:%S"), commit=commit)
+            print_result(result)
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            if scale in previous:
+                for regression in regressions(result, previous[scale], tolerance):
+                    found.append(f"{scale} courses: {regression}")
+    for regression in found:
+        print(f"Regression since the last run: {regression}")
+    return found
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency benchmarks for the recommendation and storage paths.")
+    parser.add_argument("target", nargs="?", choices=["browse", "bulk", "engine", "memory", "search", "startup", "storage",
+                                                        "suite"],
+                        default="engine")
+    parser.add_argument("--courses", type=int, default=10000,
+                        help="Synthetic courses for the storage, browse and search benchmarks, uploaded rows for "
+                             "the bulk benchmark")
+    parser.add_argument("--students", type=int, default=100000, help="Synthetic students for the storage and memory benchmarks")
+    parser.add_argument("--scales", default="100,1000,10000", help="Catalog sizes for the suite and the memory benchmark")
+    parser.add_argument("--population", type=int, default=50, help="Synthetic students per scale for the suite")
+    parser.add_argument("--engines", default="experta,fast", help="Engines the suite measures")
+    parser.add_argument("--output", default=RESULTS_FILE, help=f"Suite results file (default: {RESULTS_FILE})")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Slowdown against the last recorded run reported as a regression (default: 0.25)")
+    args = parser.parse_args()
+    if args.target == "browse":
+        benchmark_browse(args.courses)
+    elif args.target == "bulk":
+        benchmark_bulk(args.courses)
+    elif args.target == "engine":
+        benchmark_engine()
+    elif args.target == "search":
+        benchmark_search(args.courses)
+    elif args.target == "memory":
+        benchmark_memory([int(scale) for scale in args.scales.split(",")], args.students)
+    elif args.target == "startup":
+        benchmark_startup()
+    elif args.target == "storage":
+        benchmark_storage(args.courses, args.students)
+    else:
+        found = benchmark_suite([int(scale) for scale in args.scales.split(",")], args.population,
+                                args.engines.split(","), args.output, args.tolerance)
+        raise SystemExit(1 if found else 0)
@@ -0,0 +1,343 @@
+import os
+import threading
+
+import pandas as pd
+
+from prereq_graph import PrerequisiteGraph
+from records import CourseRecord, intern_code, intern_codes
+from snapshot import read_snapshot, write_snapshot
+from storage import journal_path, read_journal
+
+# ملفات لكل فئة
+CSV_FILES = {
+    "Core": "courses1.csv",
+    "E1": "E1.csv",
+    "E2": "Elective E2 Courses1.csv",
+    "E3": "Elective E3 Courses1.csv",
+    "E4": "E4.csv",
+    "E5": "E5.csv",
+    "E6": "Elective E6 Courses1.csv",
+    "University Requirement": "University Requirement Courses1.csv",
+    "University Elective": "Elective University Courses1.csv"
+}
+
+COLUMNS = ["CourseCode", "CourseName", "Description", "Prerequisites", "CoRequisites", "CreditHours",
+           "SemesterOffered", "Semester", "Category"]
+
+# Set to a database file path to store courses and students in SQLite instead of the CSV files
+DB_ENV_VAR = "AIU_SQLITE_DB"
+
+# Headers written by add_course for non-core categories
+COLUMN_ALIASES = {"Code": "CourseCode", "Course Name": "CourseName", "Credit Hours": "CreditHours"}
+
+# Columns the course browser can sort by
+SORT_COLUMNS = ["CourseCode", "CourseName", "CreditHours", "Semester", "Category"]
+
+def parse_course_list(value):
+    """Split a comma-separated requisite cell into stripped course codes"""
+    if value is None or pd.isna(value):
+        return []
+    return [code.strip() for code in str(value).split(",") if code.strip()]
+
+def normalize_columns(df, category):
+    """Rename header variants to the standard columns and add any that are missing"""
+    df = df.copy()
+    for alias, column in COLUMN_ALIASES.items():
+        if alias not in df.columns:
+            continue
+        # Files appended to by add_course can hold both headers, each filled for different rows
+        df[column] = df[column].fillna(df[alias]) if column in df.columns else df[alias]
+        df = df.drop(columns=alias)
+    for column in COLUMNS:
+        if column not in df.columns:
+            df[column] = category if column == "Category" else pd.NA
+    df["Category"] = df["Category"].fillna(category)
+    return df[COLUMNS]
+
+def apply_journal(df, entries):
+    """Replay journaled course edits, deletes and adds onto a normalized frame"""
+    if not entries:
+        return df
+    df = df.astype(object)
+    for entry in entries:
+        code = entry["code"]
+        if entry["op"] == "delete":
+            df = df[df["CourseCode"] != code]
+        elif entry["op"] == "edit":
+            mask = df["CourseCode"] == code
+            for column, value in entry["row"].items():
+                if column in COLUMNS:
+                    df.loc[mask, column] = value
+        elif entry["op"] == "add" and not (df["CourseCode"] == code).any():
+            row = {column: entry["row"].get(column, pd.NA) for column in COLUMNS}
+            df = pd.concat([df, pd.DataFrame([row], dtype=object)], ignore_index=True)
+    return df.reset_index(drop=True)
+
+def to_record(row, category):
+    """CourseRecord from a normalized row"""
+    try:
+        semester = int(row["Semester"])
+    except (ValueError, TypeError):
+        semester = None
+    return CourseRecord(
+        code=intern_code(row["CourseCode"]),
+        name=row["CourseName"] if pd.notna(row["CourseName"]) else "",
+        description=row["Description"] if pd.notna(row["Description"]) else "",
+        prerequisites=intern_codes(parse_course_list(row["Prerequisites"])),
+        co_requisites=intern_codes(parse_course_list(row["CoRequisites"])),
+        credit_hours=float(row["CreditHours"]) if pd.notna(row["CreditHours"]) else 0.0,
+        semester_offered=row["SemesterOffered"] if pd.notna(row["SemesterOffered"]) else "Both",
+        semester=semester,
+        category=row["Category"],
+        file_category=category
+    )
+
+def semester_text(value):
+    """A Semester cell as displayed: whole numbers without a decimal point, blanks empty"""
+    if value is None or pd.isna(value):
+        return ""
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return str(value)
+    return str(int(number)) if number.is_integer() else str(value)
+
+class CourseTable:
+    """Every course in one frame for browsing, with filter and sort keys computed once per catalog
+
+    A page costs a few vectorized masks and a slice of a presorted order, so only the rows shown
+    are copied out of the table.
+    """
+    def __init__(self, catalog):
+        df = catalog.all_courses()
+        # Text, so files mixing semester numbers with "All" display without a type conflict
+        df["Semester"] = df["Semester"].map(semester_text).astype(object)
+        df["Category"] = pd.Categorical(df["Category"], categories=list(CSV_FILES))
+        self.table = df.reset_index(drop=True)
+        self.semester_numbers = pd.to_numeric(self.table["Semester"], errors="coerce")
+        self.search_text = (self.table["CourseCode"].fillna("").astype(str) + " "
+                            + self.table["CourseName"].fillna("").astype(str) + " "
+                            + self.table["Description"].fillna("").astype(str)).str.lower()
+        self.semesters = sorted(int(number) for number in self.semester_numbers.dropna().unique())
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.table)
+
+    def order(self, sort, descending=False):
+        """Row positions sorted by a column, built on first use; ties keep file order"""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort}.")
+        key = (sort, descending)
+        if key not in self._orders:
+            if sort == "Semester":
+                values = self.semester_numbers
+            elif sort == "CreditHours":
+                values = pd.to_numeric(self.table[sort], errors="coerce")
+            elif sort == "Category":
+                values = self.table[sort].cat.codes
+            else:
+                values = self.table[sort].fillna("").astype(str).str.lower()
+            self._orders[key] = values.sort_values(ascending=not descending, kind="stable",
+                                                   na_position="last").index.to_numpy()
+        return self._orders[key]
+
+    def matches(self, categories=None, semester=None, offered=None, search=""):
+        """Boolean mask of the rows passing every filter given
+
+        offered matches courses given in that term or in both; search matches rows whose code,
+        name or description contain every word.
+        """
+        mask = pd.Series(True, index=self.table.index)
+        if categories:
+            mask &= self.table["Category"].isin(categories)
+        if semester is not None:
+            mask &= self.semester_numbers == semester
+        if offered:
+            mask &= self.table["SemesterOffered"].isin([offered, "Both"] if offered in ["Fall", "Spring"]
+                                                      else [offered])
+        for word in search.lower().split():
+            mask &= self.search_text.str.contains(word, regex=False)
+        return mask.to_numpy()
+
+    def page(self, mask, page=1, page_size=50, sort="CourseCode", descending=False):
+        """One page of the rows selected by a matches() mask, as a DataFrame"""
+        order = self.order(sort, descending)
+        start = (max(page, 1) - 1) * page_size
+        return self.table.iloc[order[mask[order]][start:start + page_size]].reset_index(drop=True)
+
+class CourseCatalog:
+    """All category files loaded once, with lookups by code and by category"""
+    def __init__(self, frames, source_columns=None, version=0):
+        self.frames = frames
+        self.version = version
+        # Columns actually present in each file, before missing ones were added
+        self.source_columns = source_columns or {category: list(df.columns) for category, df in frames.items()}
+        self.missing = [category for category in CSV_FILES if category not in frames]
+        self.records = {}
+        self.by_code = {}
+        for category, df in frames.items():
+            records = [to_record(row, category) for _, row in df.iterrows() if pd.notna(row["CourseCode"])]
+            self.records[category] = records
+            self.by_code[category] = {record.code: record for record in records}
+        self._prerequisite_graph = None
+        self._course_table = None
+        self.compiled = None  # The CompiledCatalog restored with this catalog from a snapshot, if any
+
+    def __getstate__(self):
+        """Everything but the browsing table, which is cheap to rebuild, for the catalog snapshot"""
+        state = self.__dict__.copy()
+        state["_course_table"] = None
+        return state
+
+    def require(self, category):
+        if category not in self.frames:
+            raise FileNotFoundError(f"[Errno 2] No such file or directory: '{CSV_FILES[category]}'")
+
+    def frame(self, category):
+        """Normalized DataFrame of one category file"""
+        self.require(category)
+        return self.frames[category]
+
+    def courses(self, category):
+        self.require(category)
+        return self.records[category]
+
+    def codes(self, category):
+        return [record.code for record in self.courses(category)]
+
+    def get(self, code, category=None):
+        """Look up a course by code, in one category or in the first category that has it"""
+        if category is not None:
+            return self.by_code.get(category, {}).get(code)
+        for courses in self.by_code.values():
+            if code in courses:
+                return courses[code]
+        return None
+
+    def prerequisite_graph(self):
+        """PrerequisiteGraph over every category, built on first use; a code's first category wins as in get"""
+        if self._prerequisite_graph is None:
+            self._prerequisite_graph = PrerequisiteGraph(
+                (record.code, record.prerequisites) for records in self.records.values() for record in records)
+        return self._prerequisite_graph
+
+    def course_table(self):
+        """CourseTable over every category, built on first use"""
+        if self._course_table is None:
+            self._course_table = CourseTable(self)
+        return self._course_table
+
+    def all_courses(self):
+        """Every category in one DataFrame, with Category set to the file's category"""
+        frames = [df.assign(Category=category) for category, df in self.frames.items()]
+        if not frames:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+# filename -> ((mtime_ns, size), DataFrame as read from disk)
+_file_cache = {}
+
+def file_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def read_csv_cached(filename):
+    """Read a CSV, reusing the previous read while the file's mtime and size are unchanged"""
+    signature = file_signature(filename)
+    if signature is None:
+        _file_cache.pop(filename, None)
+        return None
+    cached = _file_cache.get(filename)
+    if cached and cached[0] == signature:
+        return cached[1]
+    df = pd.read_csv(filename)
+    _file_cache[filename] = (signature, df)
+    return df
+
+def load_database_catalog(path, version=0):
+    """Catalog frames from the SQLite store instead of the category files"""
+    import database  # database imports this module for the column definitions
+    frames = {category: normalize_columns(pd.DataFrame(rows, columns=COLUMNS), category)
+              for category, rows in database.load_category_rows(path).items() if category in CSV_FILES}
+    return CourseCatalog(frames, {category: COLUMNS for category in frames}, version)
+
+def load_catalog(version=0):
+    db_path = os.environ.get(DB_ENV_VAR)
+    if db_path:
+        return load_database_catalog(db_path, version)
+    frames = {}
+    source_columns = {}
+    for category, filename in CSV_FILES.items():
+        while True:
+            signature = file_signature(filename)
+            df = read_csv_cached(filename)
+            entries = read_journal(filename)
+            # Replaying a journal is idempotent, so only a CSV swapped in by compaction mid-read needs a retry
+            if file_signature(filename) == signature:
+                break
+        if df is not None:
+            source_columns[category] = [COLUMN_ALIASES.get(column, column) for column in df.columns]
+            frames[category] = apply_journal(normalize_columns(df, category), entries)
+    return CourseCatalog(frames, source_columns, version)
+
+_catalog = None
+_catalog_signature = None
+_catalog_version = 0
+_catalog_reloading = False  # Set by reload_catalog(): the next load skips the snapshot
+_catalog_lock = threading.Lock()
+
+def catalog_signature():
+    """Changes whenever a category file, its journal or the SQLite store changes"""
+    if os.environ.get(DB_ENV_VAR):
+        return file_signature(os.environ[DB_ENV_VAR])
+    return tuple((file_signature(filename), file_signature(journal_path(filename)))
+                 for filename in CSV_FILES.values())
+
+def load_snapshot(signature, version):
+    """The catalog from the snapshot built from these files, with its compiled form, or None"""
+    compiled = None if os.environ.get(DB_ENV_VAR) else read_snapshot(signature)
+    if compiled is None:
+        return None
+    compiled.catalog.version = version
+    compiled.catalog.compiled = compiled
+    return compiled.catalog
+
+def get_catalog():
+    """The shared catalog, reloaded when any category file changes on disk"""
+    global _catalog, _catalog_signature, _catalog_version, _catalog_reloading
+    signature = catalog_signature()
+    with _catalog_lock:
+        if _catalog is None or signature != _catalog_signature:
+            _catalog_version += 1
+            snapshot = None if _catalog_reloading else load_snapshot(signature, _catalog_version)
+            _catalog = snapshot or load_catalog(_catalog_version)
+            _catalog_signature = signature
+            _catalog_reloading = False
+        return _catalog
+
+def save_snapshot(compiled):
+    """Store a catalog freshly compiled from the CSVs, unless the files changed since it was loaded"""
+    with _catalog_lock:
+        if os.environ.get(DB_ENV_VAR) or compiled.catalog is not _catalog:
+            return
+        signature = _catalog_signature
+    try:
+        write_snapshot(compiled, signature)
+    except OSError:
+        pass  # A read-only checkout still works, it just parses the CSVs on every start
+
+def reload_catalog():
+    """Force the next get_catalog() to re-read every file, for writes within the mtime resolution
+
+    The snapshot is skipped too, since its signature can match files rewritten within that resolution;
+    compiling the re-read catalog writes a fresh one.
+    """
+    global _catalog, _catalog_reloading
+    with _catalog_lock:
+        _catalog = None
+        _catalog_reloading = True
+        _file_cache.clear()
@@ -0,0 +1,155 @@
+import argparse
+import csv
+
+import numpy as np
+
+from inference import (ADVANCED_COURSE_MIN_CGPA, BAND_CREDIT_LIMITS, CGPA_THRESHOLDS, NON_CREDIT_COURSES,
+                       SUMMER_CREDIT_LIMIT, get_compiled_catalog, is_elective)
+from students import get_directory
+
+class CatalogMatrices:
+    """The Core catalog's courses and requisites as boolean matrices over one code axis
+
+    Columns are every course code plus every requisite code that is not a course itself, so
+    passed courses outside the catalog still count towards prerequisites.
+    """
+    def __init__(self, compiled):
+        self.courses = list(compiled.courses_by_code.values())
+        self.codes = [course["code"] for course in self.courses]
+        extra = sorted({code for course in self.courses
+                        for code in list(course["prerequisites"]) + list(course["co_requisites"])} - set(self.codes))
+        self.columns = {code: i for i, code in enumerate(self.codes + extra)}
+        self.prereqs = self.requisite_matrix("prerequisites")
+        self.co_reqs = self.requisite_matrix("co_requisites")
+        self.prereq_counts = self.prereqs.sum(axis=1)
+        self.co_req_counts = self.co_reqs.sum(axis=1)
+        self.credit_hours = np.array([course["credit_hours"] for course in self.courses])
+        self.semester = np.array([course["semester"] for course in self.courses])
+        self.offered = {season: np.array([course["semester_offered"] in ["Both", season] for course in self.courses])
+                        for season in ["Fall", "Spring", "Summer"]}
+        categories = [course["category"] for course in self.courses]
+        self.non_credit = np.array([category == "University Requirement" and code in NON_CREDIT_COURSES
+                                    for category, code in zip(categories, self.codes)])
+        self.mandatory = np.array([category == "Core" or category == "University Requirement"
+                                   for category in categories]) & ~self.non_credit
+        self.elective = np.array([is_elective(category) for category in categories])
+        # Courses the CGPA gate in recommend_mandatory applies to
+        self.advanced = self.mandatory & (self.prereq_counts > 0) & np.array(
+            [category != "University Requirement" for category in categories])
+
+    def requisite_matrix(self, field):
+        """course x code matrix, True where the code is a requisite of the course"""
+        matrix = np.zeros((len(self.courses), len(self.columns)), dtype=bool)
+        for row, course in enumerate(self.courses):
+            for code in course[field]:
+                matrix[row, self.columns[code]] = True
+        return matrix
+
+    def passed_matrix(self, passed_lists):
+        """student x code matrix of passed courses; codes outside the catalog are ignored"""
+        matrix = np.zeros((len(passed_lists), len(self.columns)), dtype=bool)
+        for row, passed in enumerate(passed_lists):
+            columns = [self.columns[code] for code in passed if code in self.columns]
+            matrix[row, columns] = True
+        return matrix
+
+def credit_limits(cgpas, current_semesters):
+    """set_credit_limit for a whole cohort; the student's semester only changes its explanation"""
+    limits = np.array(BAND_CREDIT_LIMITS)[np.searchsorted(CGPA_THRESHOLDS, cgpas, side="right")]
+    return np.where(np.asarray(current_semesters) == "Summer", SUMMER_CREDIT_LIMIT, limits)
+
+class CohortEligibility:
+    """Per (student, course) eligibility for a cohort, with each student's credit limit"""
+    def __init__(self, student_ids, codes, eligible, credit_limit, fits_limit):
+        self.student_ids = student_ids
+        self.codes = codes
+        self.eligible = eligible          # student x course
+        self.credit_limit = credit_limit  # per student
+        self.fits_limit = fits_limit      # student x course: the course alone fits the student's credit limit
+
+    def eligible_codes(self, student_index):
+        return [self.codes[i] for i in np.flatnonzero(self.eligible[student_index])]
+
+    def course_counts(self):
+        """Eligible students per course code"""
+        return dict(zip(self.codes, self.eligible.sum(axis=0).tolist()))
+
+def cohort_eligibility(students, compiled=None):
+    """Which students may take which Core catalog course, for a whole cohort at once
+
+    students are dicts with id, semester, cgpa, passed_courses and current_semester, as
+    batch.load_students yields them. A course is eligible when the rules would consider
+    it: not passed, offered this semester, within a semester of the student's level,
+    and for Core and University Requirement courses, prerequisites passed, co-requisites
+    passed or eligible themselves and the CGPA gate for advanced courses met. Failed-course
+    retakes are left to the rules. The credit budget, which depends on the order the
+    rules fire in, is reported separately as fits_limit.
+    """
+    matrices = CatalogMatrices(compiled or get_compiled_catalog())
+    students = list(students)
+    semesters = np.array([student["semester"] for student in students]).reshape(-1, 1)
+    cgpas = np.array([student["cgpa"] for student in students], dtype=float)
+    seasons = np.array([student["current_semester"] for student in students])
+    passed = matrices.passed_matrix([student["passed_courses"] for student in students])
+    n_courses = len(matrices.codes)
+
+    # Prerequisites met: every required column passed, i.e. passed . prereqs^T equals the prerequisite count
+    prereqs_met = (passed.astype(np.int32) @ matrices.prereqs.T.astype(np.int32)) == matrices.prereq_counts
+    offered = np.zeros((len(students), n_courses), dtype=bool)
+    for season, mask in matrices.offered.items():
+        offered[seasons == season] = mask
+    in_window = np.where(matrices.non_credit,
+                         (semesters <= 2) & (matrices.semester <= 2) & (matrices.credit_hours == 0),
+                         semesters >= matrices.semester - 1)
+    cgpa_ok = ~matrices.advanced | (cgpas.reshape(-1, 1) >= ADVANCED_COURSE_MIN_CGPA)
+    # Only recommend_mandatory checks requisites; elective slots and non-credit courses have none
+    candidate = (matrices.mandatory | matrices.elective | matrices.non_credit) & ~passed[:, :n_courses] \
+        & offered & in_window & (prereqs_met | ~matrices.mandatory) & cgpa_ok
+
+    # Co-requisites may be taken alongside, so an eligible co-requisite counts as met
+    available = passed.copy()
+    available[:, :n_courses] |= candidate
+    co_reqs_met = (available.astype(np.int32) @ matrices.co_reqs.T.astype(np.int32)) == matrices.co_req_counts
+    eligible = candidate & (co_reqs_met | ~matrices.mandatory)
+
+    limits = credit_limits(cgpas, seasons)
+    fits_limit = (matrices.credit_hours <= limits.reshape(-1, 1)) | (matrices.credit_hours == 0)
+    return CohortEligibility([student["id"] for student in students], matrices.codes, eligible, limits, fits_limit)
+
+def directory_students(current_semester=None):
+    """Every student in students.csv, with registered courses counted as passed as in batch advising"""
+    for student in get_directory().by_id.values():
+        if student["semester"] is None or student["cgpa"] is None:
+            continue
+        yield {
+            "id": student["id"],
+            "semester": student["semester"],
+            "cgpa": student["cgpa"],
+            "passed_courses": student["registered_courses"],
+            "current_semester": current_semester or student["current_semester"]
+        }
+
+def write_eligibility(result, f):
+    """One row per student with the eligible course codes and the credit limit"""
+    writer = csv.writer(f)
+    writer.writerow(["id", "credit_limit", "eligible_courses"])
+    for i, student_id in enumerate(result.student_ids):
+        writer.writerow([student_id, int(result.credit_limit[i]), ";".join(result.eligible_codes(i))])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Course eligibility for every student in students.csv.")
+    parser.add_argument("--semester", choices=["Fall", "Spring", "Summer"], default=None,
+                        help="Plan for this semester instead of each student's current one")
+    parser.add_argument("--output", default=None, help="Write per-student eligibility to this CSV")
+    args = parser.parse_args(argv)
+
+    result = cohort_eligibility(directory_students(args.semester))
+    for code, count in sorted(result.course_counts().items(), key=lambda item: -item[1]):
+        print(f"{code}: {count} eligible")
+    if args.output:
+        with open(args.output, "w", newline='', encoding='utf-8') as f:
+            write_eligibility(result, f)
+        print(f"Wrote eligibility for {len(result.student_ids)} students to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+from catalog import COLUMN_ALIASES, CSV_FILES, DB_ENV_VAR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    category TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT,
+    description TEXT,
+    prerequisites TEXT,
+    co_requisites TEXT,
+    credit_hours REAL,
+    semester_offered TEXT,
+    semester TEXT,
+    course_category TEXT,
+    PRIMARY KEY (category, code)
+);
+CREATE INDEX IF NOT EXISTS idx_courses_code ON courses (code);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    semester INTEGER,
+    current_semester TEXT,
+    year INTEGER,
+    cgpa REAL,
+    total_credits INTEGER,
+    registered_courses TEXT
+);
+"""
+
+# Catalog columns in the order of the courses table, after category
+COURSE_FIELDS = ["code", "name", "description", "prerequisites", "co_requisites", "credit_hours",
+                 "semester_offered", "semester", "course_category"]
+FIELD_COLUMNS = dict(zip(COURSE_FIELDS, ["CourseCode", "CourseName", "Description", "Prerequisites", "CoRequisites",
+                                         "CreditHours", "SemesterOffered", "Semester", "Category"]))
+
+def db_path():
+    """The configured database file, or None when the CSV files are the store"""
+    return os.environ.get(DB_ENV_VAR) or None
+
+_initialized = set()
+
+def connect(path=None):
+    path = path or db_path()
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    if path not in _initialized:
+        conn.executescript(SCHEMA)
+        _initialized.add(path)
+    return conn
+
+def course_values(category, course):
+    """Row values for the courses table from a dict keyed by catalog column names"""
+    values = [category]
+    for field in COURSE_FIELDS:
+        value = course.get(FIELD_COLUMNS[field])
+        values.append(None if value == "" else value)
+    return values
+
+def insert_course(conn, category, course, replace=False):
+    verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+    cur = conn.execute(f"{verb} INTO courses (category, {', '.join(COURSE_FIELDS)}) "
+                       f"VALUES ({', '.join('?' * (len(COURSE_FIELDS) + 1))})", course_values(category, course))
+    return cur.rowcount
+
+def add_course(category, course, path=None):
+    """Insert a course; returns False if the code already exists in the category"""
+    with closing(connect(path)) as conn, conn:
+        return insert_course(conn, category, course) > 0
+
+def import_courses(courses, replace=False, path=None):
+    """Insert (category, course) pairs in one transaction; returns the number of rows written"""
+    with closing(connect(path)) as conn, conn:
+        return sum(insert_course(conn, category, course, replace) for category, course in courses)
+
+def update_course(code, category, course, path=None):
+    """Update a course's columns; returns False if it does not exist"""
+    fields = [field for field in COURSE_FIELDS if field != "code" and FIELD_COLUMNS[field] in course]
+    values = [course[FIELD_COLUMNS[field]] for field in fields]
+    with closing(connect(path)) as conn, conn:
+        cur = conn.execute(f"UPDATE courses SET {', '.join(f'{field} = ?' for field in fields)} "
+                           "WHERE category = ? AND code = ?", values + [category, code])
+        return cur.rowcount > 0
+
+def delete_course(code, category, path=None):
+    with closing(connect(path)) as conn, conn:
+        return conn.execute("DELETE FROM courses WHERE category = ? AND code = ?", (category, code)).rowcount > 0
+
+def get_course(code, category, path=None):
+    """A course as a dict keyed by catalog column names, or None"""
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT * FROM courses WHERE category = ? AND code = ?", (category, code)).fetchone()
+    if row is None:
+        return None
+    return {FIELD_COLUMNS[field]: row[field] for field in COURSE_FIELDS}
+
+def load_category_rows(path=None):
+    """Every course grouped by category, as dicts keyed by catalog column names"""
+    rows = {}
+    with closing(connect(path)) as conn:
+        for row in conn.execute("SELECT * FROM courses ORDER BY category, rowid"):
+            course = {FIELD_COLUMNS[field]: row[field] for field in COURSE_FIELDS}
+            rows.setdefault(row["category"], []).append(course)
+    return rows
+
+def get_student(student_id, path=None):
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT * FROM students WHERE id = ?", (student_id,)).fetchone()
+    return dict(row) if row else None
+
+def import_files(path, csv_files=CSV_FILES, students_csv="students.csv", courses_json=None):
+    """Load the category CSVs, students.csv and optionally a JSON course export into a database"""
+    counts = {"courses": 0, "students": 0}
+    with closing(connect(path)) as conn, conn:
+        for category, filename in csv_files.items():
+            if not os.path.exists(filename):
+                continue
+            with open(filename, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    course = {COLUMN_ALIASES.get(column, column): value for column, value in row.items() if column}
+                    if course.get("CourseCode"):
+                        course["Category"] = course.get("Category") or category
+                        counts["courses"] += insert_course(conn, category, course, replace=True)
+        if courses_json and os.path.exists(courses_json):
+            with open(courses_json, encoding='utf-8') as f:
+                for course in json.load(f):
+                    # JSON exports such as csvjson.json predate the CSVs, so they only fill in courses the CSVs lack
+                    category = course.get("Category") if course.get("Category") in csv_files else "Core"
+                    counts["courses"] += insert_course(conn, category, course)
+        if students_csv and os.path.exists(students_csv):
+            with open(students_csv, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    conn.execute("INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 [row.get(column) for column in ["id", "name", "semester", "current_semester",
+                                                                 "year", "cgpa", "total_credits",
+                                                                 "registered_courses"]])
+                    counts["students"] += 1
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the course CSVs and students.csv into SQLite.")
+    parser.add_argument("--db", default=db_path() or "aiu.db", help=f"Database file (default: ${DB_ENV_VAR} or aiu.db)")
+    parser.add_argument("--json", default=None, help="Also import courses missing from the CSVs from a JSON export, "
+                                                     "e.g. csvjson.json")
+    args = parser.parse_args()
+    counts = import_files(args.db, courses_json=args.json)
+    print(f"Imported {counts['courses']} courses and {counts['students']} students into {args.db}")
+    print(f"Set {DB_ENV_VAR}={args.db} to use it.")
@@ -0,0 +1,77 @@
+import argparse
+import random
+import sys
+import time
+
+from inference import CGPA_THRESHOLDS, FastRecommender, get_compiled_catalog, student_fact
+from records import StudentProfile
+
+def generate_profiles(codes, count, seed=0):
+    """Random student profiles over the given course codes, including CGPAs right at each threshold"""
+    rng = random.Random(seed)
+    cgpas = list(CGPA_THRESHOLDS) + [0.0, 4.0]
+    for i in range(count):
+        passed = rng.sample(codes, rng.randint(0, len(codes)))
+        rest = [code for code in codes if code not in passed]
+        failed = rng.sample(rest, rng.randint(0, min(6, len(rest))))
+        yield {
+            "semester": rng.randint(1, 12),
+            "cgpa": cgpas[i % len(cgpas)] if i % 4 == 0 else round(rng.uniform(0, 4), 2),
+            "passed_courses": passed,
+            "failed_courses": failed,
+            "total_credits": rng.randint(0, 160),
+            "current_semester": rng.choice(["Fall", "Spring", "Summer"])
+        }
+
+def run_experta(compiled, profile):
+    with compiled.engine_pool.engine() as engine:
+        engine.declare(student_fact(StudentProfile.build(**profile)))
+        engine.run()
+        return engine.get_recommended_courses(), engine.elective_options, engine.explanations
+
+def run_fast(compiled, profile):
+    engine = FastRecommender(compiled)
+    engine.run(StudentProfile.build(**profile))
+    return engine.get_recommended_courses(), engine.elective_options, engine.explanations
+
+def compare(count, seed=0):
+    """Run both engines over generated profiles; returns the mismatching profiles and each engine's total time"""
+    compiled = get_compiled_catalog()
+    codes = sorted(compiled.course_codes)
+    for options in compiled.elective_index.values():
+        codes += [code for _, code, _ in options[1]]
+    codes = sorted(set(codes))
+    mismatches = []
+    elapsed = {"experta": 0.0, "fast": 0.0}
+    for profile in generate_profiles(codes, count, seed):
+        results = {}
+        for name, run in [("experta", run_experta), ("fast", run_fast)]:
+            start = time.perf_counter()
+            results[name] = run(compiled, profile)
+            elapsed[name] += time.perf_counter() - start
+        if results["experta"] != results["fast"]:
+            mismatches.append((profile, results))
+    return mismatches, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that FastRecommender matches the experta rules.")
+    parser.add_argument("--profiles", type=int, default=2000, help="Generated student profiles (default: 2000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    mismatches, elapsed = compare(args.profiles, args.seed)
+    print(f"experta {elapsed['experta'] * 1000 / args.profiles:.3f} ms/profile, "
+          f"fast {elapsed['fast'] * 1000 / args.profiles:.3f} ms/profile")
+    for profile, results in mismatches[:5]:
+        print("Mismatch for", profile)
+        for name, (courses, elective_opts, exps) in results.items():
+            print(f"  {name}: {[course['code'] for course in courses]} {elective_opts}")
+            print(f"  {name} explanations: {exps}")
+    if mismatches:
+        print(f"{len(mismatches)} of {args.profiles} profiles differ")
+        return 1
+    print(f"All {args.profiles} profiles match")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,140 @@
-import pandas as pd
+import atexit
+import io
+import json
+import logging
 import os
-import csv
-
-# ملفات لكل فئة
-CSV_FILES = {
-    "Core": "courses1.csv",
-    "E1": "E1.csv",
-    "E2": "Elective E2 Courses1.csv",
-    "E3": "Elective E3 Courses1.csv",
-    "E4": "E4.csv",
-    "E5": "E5.csv",
-    "E6": "Elective E6 Courses1.csv",
-    "University Requirement": "University Requirement Courses1.csv",
-    "University Elective": "Elective University Courses1.csv"
-}
+import threading
+import time
+
+import pandas as pd
+
+import database
+import search
+from catalog import (COLUMN_ALIASES, COLUMNS, CSV_FILES, catalog_signature, get_catalog, parse_course_list,
+                     reload_catalog, to_record)
+from inference import get_compiled_catalog
+from prereq_graph import SENIOR_STANDING, PrerequisiteGraph
+from storage import (append_journal, append_row, atomic_write_rows, clear_journal, file_lock, journal_path,
+                     read_header, read_journal, read_rows)
+
+logger = logging.getLogger(__name__)
+
+def row_code(row):
+    return row.get("CourseCode") or row.get("Code")
+
+def apply_entry(rows, fieldnames, entry):
+    """Apply one journal entry to CSV rows whose columns may use the add_course header variants"""
+    code = entry["code"]
+    if entry["op"] == "delete":
+        return [row for row in rows if row_code(row) != code]
+    if entry["op"] == "edit":
+        for row in rows:
+            if row_code(row) == code:
+                for column in fieldnames:
+                    if COLUMN_ALIASES.get(column, column) in entry["row"]:
+                        row[column] = entry["row"][COLUMN_ALIASES.get(column, column)]
+    elif entry["op"] == "add" and not any(row_code(row) == code for row in rows):
+        rows.append({column: entry["row"].get(COLUMN_ALIASES.get(column, column), "") for column in fieldnames})
+    return rows
+
+def course_record(course, category):
+    """CourseRecord of a course dict written to a category file, for updating the search index"""
+    row = {column: course.get(column) for column in COLUMNS}
+    row = {column: pd.NA if value is None or (isinstance(value, str) and not value.strip()) else value
+           for column, value in row.items()}
+    if pd.isna(row["Category"]):
+        row["Category"] = category
+    return to_record(row, category)
+
+def compact_journal(filename):
+    """Fold a CSV's journal into the file with one atomic rewrite"""
+    with file_lock(filename):
+        signature = catalog_signature()
+        entries = read_journal(filename)
+        if entries:
+            fieldnames, rows = read_rows(filename)
+            standard = [COLUMN_ALIASES.get(column, column) for column in fieldnames]
+            for entry in entries:
+                fieldnames += [column for column in entry["row"] if column not in standard and column not in fieldnames]
+                rows = apply_entry(rows, fieldnames, entry)
+            atomic_write_rows(filename, fieldnames, rows)
+        clear_journal(filename)
+        search.record_change(signature)  # Same courses, new file signature
+
+_compacting = set()
+_compacting_lock = threading.Lock()
+
+def schedule_compaction(filename):
+    """Compact a CSV's journal on a background thread, unless one is already running for it"""
+    with _compacting_lock:
+        if filename in _compacting:
+            return
+        _compacting.add(filename)
+
+    def run():
+        try:
+            while True:
+                compact_journal(filename)
+                with _compacting_lock:
+                    # Entries journaled while compacting get another pass
+                    if not os.path.exists(journal_path(filename)):
+                        _compacting.discard(filename)
+                        break
+        except Exception:
+            # The journal stays and is replayed on every read; the next write schedules another compaction
+            logger.exception("Compacting the journal of %s failed", filename)
+            return
+        finally:
+            with _compacting_lock:
+                _compacting.discard(filename)
+        schedule_snapshot()
+
+    threading.Thread(target=run, daemon=True).start()
+
+_snapshot_requested = False
+_snapshot_running = False
+_snapshot_lock = threading.Lock()
+
+def schedule_snapshot():
+    """Recompile the catalog on a background thread after a write, which also rewrites its snapshot, so the
+    next start loads the new version instead of parsing the CSVs; writes made meanwhile are folded into one
+    more pass"""
+    global _snapshot_requested, _snapshot_running
+    with _snapshot_lock:
+        _snapshot_requested = True
+        if _snapshot_running:
+            return
+        _snapshot_running = True
+
+    def run():
+        global _snapshot_requested, _snapshot_running
+        while True:
+            with _snapshot_lock:
+                if not _snapshot_requested:
+                    _snapshot_running = False
+                    return
+                _snapshot_requested = False
+            try:
+                get_compiled_catalog()
+            except (FileNotFoundError, ValueError):
+                pass  # Recommendations report a missing or malformed catalog; the write itself succeeded
+
+    threading.Thread(target=run, daemon=True).start()
+
+@atexit.register
+def compact_pending():
+    """Finish compactions still queued when the process exits normally"""
+    with _compacting_lock:
+        pending = list(_compacting)
+    for filename in pending:
+        compact_journal(filename)
+
+def prerequisite_error(course_code, prerequisites):
+    """Message rejecting prerequisites that are unknown, the course itself, or would close a cycle; None if valid"""
+    errors = get_catalog().prerequisite_graph().prerequisite_errors(course_code, parse_course_list(prerequisites))
+    if errors:
+        return f"Invalid prerequisites for {course_code}: {'; '.join(errors)}."
+    return None
 
 def add_course(course_code, course_name, description, prerequisites, co_requisites, credit_hours, semester_offered,
                semester, category):
@@ -21,11 +142,6 @@ def add_course(course_code, course_name, description, prerequisites, co_requisit
     if not filename:
         return "Undefined Category"
 
-    if os.path.exists(filename):
-        courses = pd.read_csv(filename)
-    else:
-        courses = pd.DataFrame()
-
     if category == "Core":
         new_course = {
             "CourseCode": course_code,
@@ -40,109 +156,318 @@ def add_course(course_code, course_name, description, prerequisites, co_requisit
         }
     else:
         new_course = {
-            "Code": course_code,
-            "Course Name": course_name,
+            "CourseCode": course_code,
+            "CourseName": course_name,
             "Description": description,
-            "Credit Hours": credit_hours
+            "CreditHours": credit_hours
         }
         if category == "E5" and prerequisites:
             new_course["Prerequisites"] = prerequisites
 
-    courses = pd.concat([courses, pd.DataFrame([new_course])], ignore_index=True)
-    courses.to_csv(filename, index=False)
+    if new_course.get("Prerequisites"):
+        error = prerequisite_error(course_code, new_course["Prerequisites"])
+        if error:
+            return error
+
+    if database.db_path():
+        signature = catalog_signature()
+        if not database.add_course(category, new_course):
+            return f"Course {course_code} already exists."
+        search.record_change(signature, added=[course_record(new_course, category)])
+        reload_catalog()
+        return f"{course_code} successfully added."
+
+    with file_lock(filename):
+        signature = catalog_signature()
+        if get_catalog().get(course_code, category):
+            return f"Course {course_code} already exists."
+        if os.path.exists(journal_path(filename)):
+            # Keep the add ordered after pending edits and deletes
+            append_journal(filename, {"op": "add", "code": course_code, "row": new_course})
+            search.record_change(signature, added=[course_record(new_course, category)])
+            reload_catalog()
+            schedule_compaction(filename)
+            return f"{course_code} successfully added."
+
+        fieldnames = read_header(filename) or list(new_course)
+        standard = [COLUMN_ALIASES.get(column, column) for column in fieldnames]
+        row = {column: new_course.get(COLUMN_ALIASES.get(column, column), "") for column in fieldnames}
+        missing = [column for column in new_course if column not in standard]
+        if missing:
+            # The file has no column for some field; rewrite it once with the header extended
+            _, rows = read_rows(filename)
+            row.update({column: new_course[column] for column in missing})
+            atomic_write_rows(filename, fieldnames + missing, rows + [row])
+        else:
+            append_row(filename, fieldnames, row)
+        search.record_change(signature, added=[course_record(new_course, category)])
+    reload_catalog()
+    schedule_snapshot()
 
     return f"{course_code} successfully added."
 
 def load_courses_list():
-    filename = CSV_FILES.get("Core")
-    if not filename or not os.path.exists(filename):
+    try:
+        return get_catalog().codes("Core")
+    except FileNotFoundError:
         return []
-    df = pd.read_csv(filename)
-    return df['CourseCode'].dropna().tolist()
 
 def load_course_details(course_code):
-    filename = CSV_FILES.get("Core")
-    if not filename or not os.path.exists(filename):
+    course = get_catalog().get(course_code, "Core")
+    if course is None:
         return None
-
-    with open(filename, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row.get('CourseCode') == course_code:
-                return {
-                    "name": row.get("CourseName", ""),
-                    "description": row.get("Description", ""),
-                    "prerequisites": row.get("Prerequisites", "").split(',') if row.get("Prerequisites") else [],
-                    "co_requisites": row.get("CoRequisites", "").split(',') if row.get("CoRequisites") else [],
-                    "credit_hours": int(row.get("CreditHours", 0)),
-                    "semester_offered": row.get("SemesterOffered", "Fall"),
-                    "semester": int(row.get("Semester", 1)),
-                    "category": row.get("Category", "Core")
-                }
-    return None
+    return {
+        "name": course.name,
+        "description": course.description,
+        "prerequisites": list(course.prerequisites),
+        "co_requisites": list(course.co_requisites),
+        "credit_hours": int(course.credit_hours),
+        "semester_offered": course.semester_offered,
+        "semester": course.semester or 1,
+        "category": course.category
+    }
 
 def edit_course(course_code, course_name, description, prerequisites, co_requisites, credit_hours, semester_offered,
                 semester, category):
+    updates = {
+        'CourseName': course_name,
+        'Description': description,
+        'Prerequisites': prerequisites,
+        'CoRequisites': co_requisites,
+        'CreditHours': credit_hours,
+        'SemesterOffered': semester_offered,
+        'Semester': semester,
+        'Category': category
+    }
+    if prerequisites:
+        error = prerequisite_error(course_code, prerequisites)
+        if error:
+            return error
+    record = course_record({"CourseCode": course_code, **updates}, "Core")
+    if database.db_path():
+        signature = catalog_signature()
+        if not database.update_course(course_code, "Core", updates):
+            return f"Course {course_code} does not exist."
+        search.record_change(signature, added=[record])
+        reload_catalog()
+        return f"{course_code} successfully updated."
+
     filename = CSV_FILES.get("Core")
     if not filename or not os.path.exists(filename):
         return "No Data Available."
 
-    courses = []
-    updated = False
-
-    with open(filename, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row.get('CourseCode') == course_code:
-                row.update({
-                    'CourseName': course_name,
-                    'Description': description,
-                    'Prerequisites': prerequisites,
-                    'CoRequisites': co_requisites,
-                    'CreditHours': str(credit_hours),
-                    'SemesterOffered': semester_offered,
-                    'Semester': str(semester),
-                    'Category': category
-                })
-                updated = True
-            courses.append(row)
-
-    if not updated:
-        return f"Course {course_code} does not exist."
-
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['CourseCode', 'CourseName', 'Description', 'Prerequisites', 'CoRequisites', 'CreditHours',
-                      'SemesterOffered', 'Semester', 'Category']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(courses)
+    with file_lock(filename):
+        signature = catalog_signature()
+        if get_catalog().get(course_code, "Core") is None:
+            return f"Course {course_code} does not exist."
+        append_journal(filename, {"op": "edit", "code": course_code, "row": updates})
+        search.record_change(signature, added=[record])
+    reload_catalog()
+    schedule_compaction(filename)
 
     return f"{course_code} successfully updated."
 
 def delete_course(course_code):
+    if database.db_path():
+        signature = catalog_signature()
+        if not database.delete_course(course_code, "Core"):
+            return f"Course {course_code} does not exist."
+        search.record_change(signature, removed=[("Core", course_code)])
+        reload_catalog()
+        return f"{course_code} successfully deleted."
+
     filename = CSV_FILES.get("Core")
     if not filename or not os.path.exists(filename):
         return "No Data Available."
 
-    courses = []
-    deleted = False
+    with file_lock(filename):
+        signature = catalog_signature()
+        if get_catalog().get(course_code, "Core") is None:
+            return f"Course {course_code} does not exist."
+        append_journal(filename, {"op": "delete", "code": course_code, "row": {}})
+        search.record_change(signature, removed=[("Core", course_code)])
+    reload_catalog()
+    schedule_compaction(filename)
+
+    return f"{course_code} successfully deleted."
 
-    with open(filename, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row.get('CourseCode') == course_code:
-                deleted = True
-                continue
-            courses.append(row)
+# Columns of a bulk upload or export: the catalog columns plus the category file each course belongs to
+BULK_COLUMNS = COLUMNS + ["FileCategory"]
 
-    if not deleted:
-        return f"Course {course_code} does not exist."
+SEMESTERS_OFFERED = ["Fall", "Spring", "Summer", "Both"]
+
+def read_course_upload(data, filename):
+    """Courses from an uploaded CSV or JSON file such as csvjson.json, every cell as text
+
+    Raises ValueError when the file cannot be parsed.
+    """
+    if filename.lower().endswith(".json"):
+        try:
+            records = json.loads(data)
+        except ValueError as e:
+            raise ValueError(f"{filename} is not valid JSON: {e}")
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise ValueError(f"{filename} must hold a list of course objects.")
+        df = pd.DataFrame(records, dtype=object)
+    else:
+        try:
+            df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"{filename} is not a readable CSV file: {e}")
+    df = df.rename(columns=COLUMN_ALIASES).fillna("").astype(str).reset_index(drop=True)
+    # Free text is kept as written; codes and the fields validated as values are not
+    for column in ["CourseCode", "CreditHours", "SemesterOffered", "Semester", "Category", "FileCategory"]:
+        if column in df.columns:
+            df[column] = df[column].str.strip()
+    return df
 
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['CourseCode', 'CourseName', 'Description', 'Prerequisites', 'CoRequisites', 'CreditHours',
-                      'SemesterOffered', 'Semester', 'Category']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(courses)
+def requisite_codes_by_row(df, column):
+    """One entry per code named in a requisite column, indexed by upload row; senior standing is not a code"""
+    codes = df[column].str.split(",").explode().str.split("&").explode().str.strip()
+    # Plain objects, as isin against a large set is far slower on Arrow-backed strings
+    return codes[codes.notna() & (codes != "") & (codes != SENIOR_STANDING)].astype(object)
+
+def validate_courses(df, replace=False, catalog=None):
+    """Check a whole upload at once: columns, codes, categories, duplicates, credit hours, semesters and
+    requisites, against the upload itself and the current catalog
+
+    Returns the courses with FileCategory resolved and a list of errors; nothing may be written
+    unless the list is empty. Without FileCategory, a course goes to the file that already has
+    its code, else to its Category's file, else to courses1.csv, as in database.import_files.
+    """
+    catalog = catalog or get_catalog()
+    unknown = [column for column in df.columns if column not in BULK_COLUMNS]
+    missing = [column for column in ["CourseCode", "CourseName"] if column not in df.columns]
+    errors = []
+    if unknown:
+        errors.append(f"Unknown columns: {', '.join(unknown)}.")
+    if missing:
+        errors.append(f"Missing columns: {', '.join(missing)}.")
+    if errors:
+        return df, errors
+    df = df.reindex(columns=BULK_COLUMNS, fill_value="")
+
+    existing_category = {}
+    for category, courses in catalog.by_code.items():
+        for code in courses:
+            existing_category.setdefault(code, category)
+    file_category = df["FileCategory"].where(df["FileCategory"] != "", df["CourseCode"].map(existing_category))
+    file_category = file_category.fillna(df["Category"].where(df["Category"].isin(list(CSV_FILES)), "Core"))
+    df["FileCategory"] = file_category
+    df["Category"] = df["Category"].where(df["Category"] != "", file_category)
+
+    problems = []  # (mask over rows, message); messages may be Series aligned with the rows
+    problems.append((df["CourseCode"] == "", "CourseCode is empty"))
+    problems.append((df["CourseName"] == "", "CourseName is empty"))
+    problems.append((~file_category.isin(list(CSV_FILES)), "FileCategory " + file_category + " is not a category"))
+    problems.append((df.duplicated(["FileCategory", "CourseCode"]) & (df["CourseCode"] != ""),
+                     "CourseCode " + df["CourseCode"] + " appears earlier in the upload"))
+    if not replace:
+        problems.append((existing_courses(df, catalog), df["CourseCode"] + " already exists in " + file_category))
+    credit_hours = pd.to_numeric(df["CreditHours"], errors="coerce")
+    problems.append((credit_hours.isna() | (credit_hours < 0), "CreditHours must be a number of at least 0"))
+    problems.append(((df["SemesterOffered"] != "") & ~df["SemesterOffered"].isin(SEMESTERS_OFFERED),
+                     f"SemesterOffered must be one of {', '.join(SEMESTERS_OFFERED)}"))
+    semester = pd.to_numeric(df["Semester"], errors="coerce")
+    semester_number = (semester % 1 == 0) & semester.between(1, 12)
+    # The rules need a semester number for every course in courses1.csv; other files may say All
+    problems.append((~semester_number & ((file_category == "Core") | ~df["Semester"].isin(["", "All"])),
+                     "Semester must be a whole number from 1 to 12" +
+                     pd.Series(" or All", index=df.index).where(file_category != "Core", "")))
+
+    known = set(existing_category) | set(df["CourseCode"])
+    requisites = {}
+    for column in ["Prerequisites", "CoRequisites"]:
+        codes = requisites[column] = requisite_codes_by_row(df, column)
+        # Indexed by upload row with repeats, one entry per code
+        problems.append((codes == df["CourseCode"].reindex(codes.index), f"{column}: a course cannot require itself"))
+        problems.append((~codes.isin(known), codes + f" in {column} is not in the catalog or the upload"))
+
+    found = []
+    for mask, message in problems:
+        if isinstance(message, str):
+            message = pd.Series(message, index=mask.index)
+        found += [(row, f"Row {row + 1}: {text}.") for row, text in message[mask.values].items()]
+    errors = [text for _, text in sorted(found, key=lambda error: error[0])]
+
+    if not errors:
+        # Uploaded courses first, so their prerequisites replace the catalog's for the same code
+        prereqs = {}
+        for row, code in requisites["Prerequisites"].items():
+            prereqs.setdefault(row, []).append(code)
+        graph = PrerequisiteGraph(
+            [(code, prereqs.get(row, [])) for row, code in df["CourseCode"].items()] +
+            [(record.code, record.prerequisites) for records in catalog.records.values() for record in records])
+        if graph.cycle:
+            errors.append(f"Prerequisite cycle: {' -> '.join(graph.cycle)}.")
+    return df, errors
+
+def existing_courses(df, catalog):
+    """Which rows of a validated upload name a course already in their category file"""
+    pairs = [(category, code) for category, courses in catalog.by_code.items() for code in courses]
+    return pd.Series(pd.MultiIndex.from_arrays([df["FileCategory"], df["CourseCode"]]).isin(pairs), index=df.index)
+
+def write_category_courses(category, courses):
+    """Add or replace courses in one category file with a single rewrite; courses are dicts of catalog columns"""
+    filename = CSV_FILES[category]
+    with file_lock(filename):
+        compact_journal(filename)  # Pending edits and deletes go into the rewrite
+        signature = catalog_signature()
+        fieldnames, rows = read_rows(filename) if os.path.exists(filename) else (None, [])
+        fieldnames = list(fieldnames or COLUMNS)
+        standard = [COLUMN_ALIASES.get(column, column) for column in fieldnames]
+        fieldnames += [column for column in COLUMNS
+                       if column not in standard and any(course[column] for course in courses)]
+        positions = {row_code(row): i for i, row in enumerate(rows)}
+        for course in courses:
+            row = {column: course.get(COLUMN_ALIASES.get(column, column), "") for column in fieldnames}
+            if course["CourseCode"] in positions:
+                rows[positions[course["CourseCode"]]] = row
+            else:
+                positions[course["CourseCode"]] = len(rows)
+                rows.append(row)
+        atomic_write_rows(filename, fieldnames, rows)
+        search.record_change(signature, added=[course_record(course, category) for course in courses])
+
+def import_courses(df, replace=False):
+    """Validate an upload and, only if all of it is valid, write each category file once
+
+    Returns the errors, the numbers of courses added and replaced, and the milliseconds spent
+    validating and writing.
+    """
+    start = time.perf_counter()
+    catalog = get_catalog()
+    df, errors = validate_courses(df, replace, catalog)
+    result = {"errors": errors, "added": 0, "replaced": 0, "validate_ms": (time.perf_counter() - start) * 1000,
+              "write_ms": 0.0}
+    if errors:
+        return result
+    start = time.perf_counter()
+    result["replaced"] = int(existing_courses(df, catalog).sum())
+    result["added"] = len(df) - result["replaced"]
+    by_category = {category: group[COLUMNS].to_dict("records") for category, group in df.groupby("FileCategory")}
+    if database.db_path():
+        signature = catalog_signature()
+        database.import_courses([(category, course) for category, courses in by_category.items()
+                                 for course in courses], replace)
+        search.record_change(signature, added=[course_record(course, category)
+                                               for category, courses in by_category.items() for course in courses])
+        reload_catalog()
+    else:
+        for category, courses in by_category.items():
+            write_category_courses(category, courses)
+        reload_catalog()
+        schedule_snapshot()
+    result["write_ms"] = (time.perf_counter() - start) * 1000
+    return result
 
-    return f"{course_code} successfully deleted."
\ No newline at end of file
+def export_courses(fmt="csv", catalog=None):
+    """Every course with its FileCategory, as CSV or as JSON records like csvjson.json; import_courses reads
+    either back"""
+    catalog = catalog or get_catalog()
+    frames = [df.assign(FileCategory=category) for category, df in catalog.frames.items()]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=BULK_COLUMNS)
+    df = df.astype(object).where(df.notna(), "")
+    if fmt == "json":
+        return df.to_json(orient="records", indent=2, force_ascii=False).encode("utf-8")
+    return df.to_csv(index=False).encode("utf-8")
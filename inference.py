@@ -1,26 +1,66 @@
-import pandas as pd
-from experta import *
+import bisect
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
-# Load course data
-try:
-    courses_df = pd.read_csv("courses1.csv")
-except FileNotFoundError:
-    raise FileNotFoundError("Could not find courses1.csv. Ensure the file exists in the project directory.")
+import pandas as pd
+from experta import AS, MATCH, NOT, TEST, DefFacts, Fact, Field, KnowledgeEngine, Rule
+from experta.agenda import Agenda
+from experta.factlist import FactList
+from catalog import get_catalog, parse_course_list, save_snapshot
+from profiling import profile_run, timed_rule, timed_test
+from records import StudentProfile, intern_code, intern_codes
 
-# Validate required columns
 required_columns = ["CourseCode", "CourseName", "Category", "Prerequisites", "CoRequisites", "CreditHours", "SemesterOffered", "Semester"]
-if not all(col in courses_df.columns for col in required_columns):
-    raise ValueError(f"courses1.csv is missing required columns. Expected: {required_columns}")
+
+# Non-credit University Requirement courses mandatory in the first level
+NON_CREDIT_COURSES = frozenset(["CSE011", "LAN022"])
+
+# CGPA values the rules branch on (set_credit_limit, and 2.00 in recommend_mandatory)
+CGPA_THRESHOLDS = (1.67, 2.00, 3.00)
+
+# Credit limit set_credit_limit assigns in each CGPA band of CGPA_THRESHOLDS, and in Summer
+BAND_CREDIT_LIMITS = (12, 12, 20, 22)
+SUMMER_CREDIT_LIMIT = 9
+
+# Below this CGPA, recommend_mandatory holds back courses that have prerequisites
+ADVANCED_COURSE_MIN_CGPA = 2.00
+
+# Total credits from which a student has senior standing
+SENIOR_CREDITS = 125
+
+# Set to 1 to run the rules with FastRecommender instead of the experta engine
+FAST_PATH_ENV_VAR = "AIU_FAST_PATH"
+
+# Most recent distinct student profiles whose recommendations are kept per catalog version; 0 disables
+RESULT_CACHE_SIZE = 1024
 
 class Student(Fact):
     """Student information"""
     semester = Field(int, mandatory=True)
     cgpa = Field(float, mandatory=True)
-    passed = Field(list, mandatory=True)
-    failed = Field(list, mandatory=True)
+    passed = Field(set, mandatory=True)  # Stored frozen, so membership tests are O(1)
+    failed = Field(set, mandatory=True)
     credits = Field(int, mandatory=True)
     current_semester = Field(str, mandatory=True)  # "Fall", "Spring", or "Summer"
 
+# Student fields in StudentProfile order
+STUDENT_FIELDS = ("semester", "cgpa", "passed", "failed", "credits", "current_semester")
+
+def student_fact(profile):
+    return Student(**dict(zip(STUDENT_FIELDS, profile)))
+
+def validate_profile(profile):
+    """Raise the ValueError declaring the profile's Student fact would, building the fact only when invalid"""
+    try:
+        for name, value in zip(STUDENT_FIELDS, profile):
+            Student.__fields__[name].validate(value)
+    except Exception:
+        student_fact(profile).validate()
+
 class Course(Fact):
     """Course information"""
     code = Field(str, mandatory=True)
@@ -43,37 +83,220 @@ class Explanation(Fact):
     course_code = Field(str, mandatory=True)
     explanation = Field(str, mandatory=True)
 
-class CourseRecommender(KnowledgeEngine):
-    def __init__(self):
-        super().__init__()
+def build_course_facts(df):
+    """Parse catalog rows into Course facts once, collecting the rows that had to be skipped"""
+    facts = []
+    skipped = []
+    for _, row in df.iterrows():
+        try:
+            facts.append(Course(
+                code=intern_code(row["CourseCode"]),
+                name=row["CourseName"],
+                category=row["Category"],
+                prerequisites=list(intern_codes(parse_course_list(row["Prerequisites"]))),
+                co_requisites=list(intern_codes(parse_course_list(row["CoRequisites"]))),
+                credit_hours=float(row["CreditHours"]) if pd.notna(row["CreditHours"]) else 0.0,
+                semester_offered=row["SemesterOffered"],
+                semester=int(row["Semester"]) if pd.notna(row["Semester"]) else 1
+            ))
+        except (ValueError, TypeError) as e:
+            skipped.append(f"Skipped course {row['CourseCode']}: Invalid data ({str(e)}).")
+    return facts, skipped
+
+def is_elective(category):
+    return category.startswith("E") or category == "University Elective"
+
+def build_elective_index(catalog):
+    """Map each elective category to its courses as (credit_hours, code, prerequisites), sorted by credits
+
+    Options come from the elective category files only; the elective rows in courses1.csv are the slots
+    these options fill, so they are never options themselves.
+    """
+    index = {}
+    slots = {record.code for record in catalog.courses("Core") if is_elective(record.category)}
+    records = [(category, record) for category in catalog.frames if category != "Core" and is_elective(category)
+               for record in catalog.courses(category) if record.code not in slots]
+    seen = set()
+    for cat, record in records:
+        if not is_elective(cat) or (cat, record.code) in seen:
+            continue
+        seen.add((cat, record.code))
+        index.setdefault(cat, []).append((record.credit_hours, record.code, frozenset(record.prerequisites)))
+    for options in index.values():
+        options.sort()
+    return {cat: ([option[0] for option in options], options) for cat, options in index.items()}
+
+def build_firing_order(course_facts):
+    """Course facts in the order the engine fires their activations within one salience level
+
+    The engine drops facts identical to one already declared, and DepthStrategy fires the
+    most recently declared fact first.
+    """
+    unique = {}
+    for fact in course_facts:
+        fact.validate()  # The engine validates on declare, so bad data fails both engines alike
+        unique.setdefault(FactList._get_fact_id(fact), fact)
+    return list(reversed(list(unique.values())))
+
+def build_change_index(firing_order, elective_index):
+    """For each course code, the firing positions whose activations depend on the code being passed or failed
+
+    Positions count the failed-course pass over the firing order and then the main pass, as
+    FastRecommender.fire runs them. A course depends on its own code, its requisites and, for an
+    elective slot, the options and option prerequisites eligible_electives checks.
+    """
+    count = len(firing_order)
+    positions = {}
+    slots = {}
+    for position, course in enumerate(firing_order):
+        positions.setdefault(course["code"], set()).update([position, count + position])
+        for code in course["prerequisites"] + course["co_requisites"]:
+            positions.setdefault(code, set()).add(count + position)
+        if is_elective(course["category"]):
+            slots.setdefault(course["category"], []).append(count + position)
+    for cat, slot_positions in slots.items():
+        for _, code, prereqs in elective_index.get(cat, ([], []))[1]:
+            for dependency in (code, *prereqs):
+                positions.setdefault(dependency, set()).update(slot_positions)
+    return {code: tuple(sorted(affected)) for code, affected in positions.items()}
+
+def load_courses_df(catalog):
+    """The main course table, validated for the columns the rules need"""
+    try:
+        courses_df = catalog.frame("Core")
+    except FileNotFoundError:
+        raise FileNotFoundError("Could not find courses1.csv. Ensure the file exists in the project directory.")
+    if not all(col in catalog.source_columns["Core"] for col in required_columns):
+        raise ValueError(f"courses1.csv is missing required columns. Expected: {required_columns}")
+    return courses_df
+
+class CompiledCatalog:
+    """Course facts, indexes and warmed engines built once per catalog version"""
+    def __init__(self, catalog):
+        self.catalog = catalog
+        courses_df = load_courses_df(catalog)
+        self.course_facts, self.skipped_courses = build_course_facts(courses_df)
+        self.course_codes = frozenset(courses_df["CourseCode"])
+        self.courses_by_code = {}
+        for fact in self.course_facts:
+            self.courses_by_code.setdefault(fact["code"], fact)
+        self.firing_order = build_firing_order(self.course_facts)
+        self.elective_index = build_elective_index(catalog)
+        self.change_index = build_change_index(self.firing_order, self.elective_index)
+        self.init_runtime()
+
+    def init_runtime(self):
+        self.engine_pool = EnginePool(self)
+        # Results depend on the catalog, so a new catalog version starts with an empty cache
+        self.result_cache = RecommendationCache(RESULT_CACHE_SIZE)
+
+    def __getstate__(self):
+        """Everything but the engines and cached results, for the catalog snapshot"""
+        state = self.__dict__.copy()
+        del state["engine_pool"], state["result_cache"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.init_runtime()
+
+_compiled = None
+_compiled_lock = threading.Lock()
+_snapshot_thread = None  # Writing the snapshot of the latest compile, off the request path
+
+def get_compiled_catalog():
+    """Compiled data for the current catalog, built on first use and rebuilt when the catalog files change"""
+    global _compiled, _snapshot_thread
+    catalog = get_catalog()
+    with _compiled_lock:
+        if _compiled is None or _compiled.catalog is not catalog:
+            # A snapshot stores inference.CompiledCatalog; when this file runs as a script its classes live in
+            # __main__, and rules built from the snapshot's classes would not match this module's facts
+            if type(catalog.compiled) is CompiledCatalog:
+                _compiled = catalog.compiled  # Restored from the snapshot with the catalog
+            else:
+                _compiled = CompiledCatalog(catalog)
+                if __name__ != "__main__":  # The application could not load a snapshot of __main__ classes
+                    _snapshot_thread = threading.Thread(target=save_snapshot, args=(_compiled,))
+                    _snapshot_thread.start()
+        return _compiled
+
+class RecommenderState:
+    """Per-student state and results shared by CourseRecommender and FastRecommender"""
+    def clear_session(self):
+        """Reset the per-student state kept on the engine"""
         self.recommendations = []
-        self.explanations = []
+        self.recommended = set()  # Same codes as self.recommendations, for O(1) lookups
+        self.explanations = list(self.compiled.skipped_courses)
         self.credit_limit = 0
         self.total_credits = 0
-        self.passed = []
-        self.failed = []
+        self.passed = frozenset()
+        self.failed = frozenset()
         self.elective_options = {}
 
+    def eligible_electives(self, cat, credit_budget):
+        """Courses in an elective category that fit the credit budget and whose prerequisites are passed"""
+        credit_hours, options = self.compiled.elective_index.get(cat, ([], []))
+        fitting = options[:bisect.bisect_right(credit_hours, credit_budget)]
+        return [code for _, code, prereqs in fitting
+                if code not in self.passed and prereqs <= self.passed]
+
+    def get_recommendations(self):
+        return self.recommendations, self.elective_options, self.explanations
+
+    def get_recommended_courses(self):
+        """Recommendations in order, with the course details the UI needs to display and total them"""
+        reasons = self.recommendation_reasons()
+        courses = []
+        for code in self.recommendations:
+            course = self.compiled.courses_by_code[code]
+            courses.append({
+                "code": code,
+                "name": course["name"],
+                "credit_hours": course["credit_hours"],
+                "category": course["category"],
+                "reason": reasons.get(code, "")
+            })
+        return courses
+
+class CourseRecommender(RecommenderState, KnowledgeEngine):
+    def __init__(self, compiled=None):
+        self.compiled = compiled or get_compiled_catalog()
+        super().__init__()
+        self.baseline_fact_index = None
+        self.clear_session()
+
+    def warm_up(self):
+        """Declare the course facts once and remember where per-student facts start"""
+        self.reset()
+        self.baseline_fact_index = self.facts.last_index
+
+    def retract_session(self):
+        """Retract every fact declared after warm-up so the engine only holds course facts again"""
+        for idx in [idx for idx in self.facts if idx >= self.baseline_fact_index]:
+            self.facts.retract(idx)
+        added, removed = self.get_activations()
+        self.strategy.update_agenda(self.agenda, added, removed)
+        self.agenda = Agenda()
+        self.clear_session()
+
+    def modify_student(self, student, **changes):
+        """Retract the facts the last run declared and replace the Student fact; the course facts stay in
+        working memory. Returns the new Student fact, ready to run."""
+        for idx in [idx for idx, fact in self.facts.items() if idx >= self.baseline_fact_index and fact is not student]:
+            self.facts.retract(idx)
+        self.clear_session()
+        return self.modify(student, **changes)
+
     @DefFacts()
     def load_courses(self):
         """Load courses as Facts"""
-        for _, row in courses_df.iterrows():
-            try:
-                yield Course(
-                    code=row["CourseCode"],
-                    name=row["CourseName"],
-                    category=row["Category"],
-                    prerequisites=str(row["Prerequisites"]).split(",") if pd.notna(row["Prerequisites"]) else [],
-                    co_requisites=str(row["CoRequisites"]).split(",") if pd.notna(row["CoRequisites"]) else [],
-                    credit_hours=float(row["CreditHours"]) if pd.notna(row["CreditHours"]) else 0.0,
-                    semester_offered=row["SemesterOffered"],
-                    semester=int(row["Semester"]) if pd.notna(row["Semester"]) else 1
-                )
-            except (ValueError, TypeError) as e:
-                self.explanations.append(f"Skipped course {row['CourseCode']}: Invalid data ({str(e)}).")
+        for fact in self.compiled.course_facts:
+            yield fact.copy()
 
     @Rule(AS.student << Student(semester=MATCH.semester, cgpa=MATCH.cgpa, current_semester=MATCH.current_semester),
           salience=100)
+    @timed_rule
     def set_credit_limit(self, student, semester, cgpa, current_semester):
         """Set credit limit based on CGPA and semester"""
         if current_semester == "Summer":
@@ -94,26 +317,29 @@ class CourseRecommender(KnowledgeEngine):
         else:
             self.credit_limit = 22
             self.explanations.append(f"Credit limit set to 22 due to CGPA {cgpa} >= 3.00.")
-        self.declare(Student(**dict(student)))
+        self.passed = student["passed"]
+        self.failed = student["failed"]
 
     @Rule(AS.student << Student(passed=MATCH.passed, failed=MATCH.failed, current_semester=MATCH.current_semester),
           AS.course << Course(code=MATCH.code, semester_offered=MATCH.sem_off, credit_hours=MATCH.credits),
-          TEST(lambda code, failed: code in failed),
-          TEST(lambda code, passed: code not in passed),
+          TEST(timed_test("recommend_failed", lambda code, failed: code in failed)),
+          TEST(timed_test("recommend_failed", lambda code, passed: code not in passed)),
           salience=90)
+    @timed_rule
     def recommend_failed(self, course, code, credits, current_semester):
         """Recommend failed courses for retaking"""
-        if code not in courses_df["CourseCode"].values:
+        if code not in self.compiled.course_codes:
             self.explanations.append(f"Not recommended {code}: Course not found in course database.")
             self.declare(Explanation(course_code=code, explanation="Course not found in course database."))
             return
-        if code not in self.recommendations:
+        if code not in self.recommended:
             if course["semester_offered"] not in ["Both", current_semester]:
                 self.explanations.append(f"Not recommended {code}: Course not offered in {current_semester}.")
                 self.declare(Explanation(course_code=code, explanation=f"Course not offered in {current_semester}."))
                 return
             if self.total_credits + credits <= self.credit_limit or credits == 0:
                 self.recommendations.insert(0, code)
+                self.recommended.add(code)
                 self.total_credits += credits
                 self.explanations.append(f"Prioritized {code}: Retake due to previous failure.")
                 self.declare(Recommendation(course_code=code, course_name=course["name"], reason="Retake due to previous failure"))
@@ -126,22 +352,25 @@ class CourseRecommender(KnowledgeEngine):
 
     @Rule(AS.student << Student(semester=MATCH.semester, passed=MATCH.passed, current_semester=MATCH.current_semester),
           AS.course << Course(code=MATCH.code, credit_hours=0, semester_offered=MATCH.sem_off, category="University Requirement", semester=MATCH.course_sem),
-          TEST(lambda semester, course_sem, code, passed: semester <= 2 and course_sem <= 2 and code not in passed and code in ["CSE011", "LAN022"]),
-          TEST(lambda sem_off, current_semester: sem_off in ["Both", current_semester]))
+          TEST(timed_test("recommend_non_credit", lambda semester, course_sem, code, passed: semester <= 2 and course_sem <= 2 and code not in passed and code in NON_CREDIT_COURSES)),
+          TEST(timed_test("recommend_non_credit", lambda sem_off, current_semester: sem_off in ["Both", current_semester])))
+    @timed_rule
     def recommend_non_credit(self, course, code):
         """Recommend non-credit mandatory courses (CSE011, LAN022) in Semesters 1-2"""
-        if code not in self.recommendations:
+        if code not in self.recommended:
             self.recommendations.append(code)
+            self.recommended.add(code)
             self.explanations.append(f"Recommended {code}: Mandatory non-credit course for first level.")
             self.declare(Recommendation(course_code=code, course_name=course["name"], reason="Mandatory non-credit course"))
 
     @Rule(AS.student << Student(semester=MATCH.semester, cgpa=MATCH.cgpa, passed=MATCH.passed, credits=MATCH.total_credits, current_semester=MATCH.current_semester),
           AS.course << Course(code=MATCH.code, category=MATCH.cat, prerequisites=MATCH.prereqs, co_requisites=MATCH.co_reqs, credit_hours=MATCH.credits, semester_offered=MATCH.sem_off, semester=MATCH.course_sem),
-          TEST(lambda cat, code: cat == "Core" or (cat == "University Requirement" and code not in ["CSE011", "LAN022"])),
+          TEST(timed_test("recommend_mandatory", lambda cat, code: cat == "Core" or (cat == "University Requirement" and code not in NON_CREDIT_COURSES))),
           NOT(Recommendation(course_code=MATCH.code)),
-          TEST(lambda code, passed: code not in passed),
-          TEST(lambda sem_off, current_semester: sem_off in ["Both", current_semester]),
-          TEST(lambda semester, course_sem: semester >= course_sem or abs(semester - course_sem) <= 1))
+          TEST(timed_test("recommend_mandatory", lambda code, passed: code not in passed)),
+          TEST(timed_test("recommend_mandatory", lambda sem_off, current_semester: sem_off in ["Both", current_semester])),
+          TEST(timed_test("recommend_mandatory", lambda semester, course_sem: semester >= course_sem or abs(semester - course_sem) <= 1)))
+    @timed_rule
     def recommend_mandatory(self, student, course, code, prereqs, co_reqs, credits, cgpa, total_credits, cat):
         """Recommend core and university requirement courses"""
         is_senior = student["semester"] >= 9 or total_credits >= 125
@@ -152,14 +381,16 @@ class CourseRecommender(KnowledgeEngine):
 
         prereqs_list = list(prereqs)  # Convert frozenlist to list
         co_reqs_list = list(co_reqs)
-        if all(prereq.strip() in student["passed"] for prereq in prereqs_list if prereq.strip()):
-            if all(co_req.strip() in student["passed"] or co_req.strip() in self.recommendations for co_req in co_reqs_list if co_req.strip()):
+        passed = student["passed"]
+        if all(prereq in passed for prereq in prereqs):
+            if all(co_req in passed or co_req in self.recommended for co_req in co_reqs):
                 if prereqs_list and cgpa < 2.00 and cat != "University Requirement":
                     self.explanations.append(f"Not recommended {code}: CGPA {cgpa} below 2.00 for advanced course.")
                     self.declare(Explanation(course_code=code, explanation=f"CGPA {cgpa} below 2.00 for advanced course."))
                     return
                 if self.total_credits + credits <= self.credit_limit or credits == 0:
                     self.recommendations.append(code)
+                    self.recommended.add(code)
                     self.total_credits += credits
                     self.explanations.append(f"Recommended {code}: {cat} course, prerequisites {prereqs_list} met, CGPA {cgpa} sufficient.")
                     self.declare(Recommendation(course_code=code, course_name=course["name"], reason=f"{cat} course, prerequisites met"))
@@ -175,22 +406,22 @@ class CourseRecommender(KnowledgeEngine):
 
     @Rule(AS.student << Student(semester=MATCH.semester, passed=MATCH.passed, current_semester=MATCH.current_semester),
           AS.course << Course(code=MATCH.code, category=MATCH.cat, credit_hours=MATCH.credits, semester_offered=MATCH.sem_off, semester=MATCH.course_sem),
-          TEST(lambda cat: cat.startswith("E") or cat == "University Elective"),
+          TEST(timed_test("recommend_elective_placeholder", lambda cat: is_elective(cat))),
           NOT(Recommendation(course_code=MATCH.code)),
-          TEST(lambda code, passed: code not in passed),
-          TEST(lambda sem_off, current_semester: sem_off in ["Both", current_semester]),
-          TEST(lambda semester, course_sem: semester >= course_sem or abs(semester - course_sem) <= 1))
+          TEST(timed_test("recommend_elective_placeholder", lambda code, passed: code not in passed)),
+          TEST(timed_test("recommend_elective_placeholder", lambda sem_off, current_semester: sem_off in ["Both", current_semester])),
+          TEST(timed_test("recommend_elective_placeholder", lambda semester, course_sem: semester >= course_sem or abs(semester - course_sem) <= 1)))
+    @timed_rule
     def recommend_elective_placeholder(self, course, code, cat, credits):
         """Recommend elective placeholders"""
         if self.total_credits + credits <= self.credit_limit:
             self.recommendations.append(code)
+            self.recommended.add(code)
             self.total_credits += credits
             self.explanations.append(f"Recommended {code}: {cat} course required in Semester {course['semester']}.")
             self.declare(Recommendation(course_code=code, course_name=course["name"], reason=f"{cat} course required"))
-            eligible = [row["CourseCode"] for _, row in courses_df.iterrows()
-                        if row["Category"] == cat
-                        and all(prereq.strip() in self.passed for prereq in str(row["Prerequisites"]).split(",") if prereq.strip())
-                        and float(row["CreditHours"]) + self.total_credits - credits <= self.credit_limit]
+            eligible = self.eligible_electives(cat, self.credit_limit - self.total_credits + credits)
+            self.elective_options[code] = eligible
             if eligible:
                 self.explanations.append(f"Eligible courses for {code} ({cat}): {eligible}.")
                 self.declare(Explanation(course_code=code, explanation=f"Eligible courses: {eligible}."))
@@ -198,24 +429,485 @@ class CourseRecommender(KnowledgeEngine):
                 self.explanations.append(f"No eligible courses for {code} ({cat}) due to prerequisites or credit limit.")
                 self.declare(Explanation(course_code=code, explanation="No eligible courses due to prerequisites or credit limit."))
 
-    def get_recommendations(self):
-        return self.recommendations, self.elective_options, self.explanations
+    def recommendation_reasons(self):
+        return {fact["course_code"]: fact["reason"] for fact in self.facts.values()
+                if isinstance(fact, Recommendation)}
+
+    def declared_fact_counts(self):
+        """Facts declared since warm-up, by type"""
+        counts = {}
+        for idx, fact in self.facts.items():
+            if idx >= self.baseline_fact_index:
+                counts[type(fact).__name__] = counts.get(type(fact).__name__, 0) + 1
+        return counts
+
+class EnginePool:
+    """Warmed-up CourseRecommender engines reused across requests"""
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.idle = queue.LifoQueue()
+
+    @contextmanager
+    def engine(self):
+        try:
+            engine = self.idle.get_nowait()
+        except queue.Empty:
+            engine = CourseRecommender(self.compiled)
+            engine.warm_up()
+        yield engine
+        # An engine that raised mid-run is dropped instead of being returned dirty
+        engine.retract_session()
+        self.idle.put(engine)
+
+class FastRecommender(RecommenderState):
+    """The CourseRecommender rules as straight-line passes over the compiled course facts
+
+    Produces the same recommendations, elective options and explanations in the same
+    order as the experta engine, without building facts or an agenda per student.
+    Keep each pass in step with the rule of the same name.
+    """
+    def __init__(self, compiled=None):
+        self.compiled = compiled or get_compiled_catalog()
+        self.clear_session()
+
+    def clear_session(self):
+        super().clear_session()
+        self.reasons = {}
+        self.fired = []  # (code, first) per recommendation, in order, so rollback can undo them
+        self.marks = None  # Per firing position of a resumable run: explanations, fired and credits before it
+
+    def recommendation_reasons(self):
+        return self.reasons
+
+    def recommend(self, code, course, reason, first=False):
+        if first:
+            self.recommendations.insert(0, code)
+        else:
+            self.recommendations.append(code)
+        self.recommended.add(code)
+        self.reasons[code] = reason
+        self.fired.append((code, first))
+
+    def run(self, profile, resumable=False):
+        """Recommend for a profile; a resumable run keeps what update needs to re-fire part of it"""
+        validate_profile(profile)
+        self.profile = profile
+        self.set_credit_limit(profile.semester, profile.cgpa, profile.current_semester, profile.passed, profile.failed)
+        self.marks = [] if resumable else None
+        self.fire(0)
+        return self.get_recommendations()
+
+    def fire(self, start, stop=None):
+        """Run the firing positions from start up to stop: the failed-course pass, then the main pass"""
+        profile = self.profile
+        semester, cgpa, total_credits, current_semester = (profile.semester, profile.cgpa, profile.total_credits,
+                                                           profile.current_semester)
+        courses = self.compiled.firing_order
+        stop = 2 * len(courses) if stop is None else stop
+        marks, explanations, fired = self.marks, self.explanations, self.fired
+        # Salience 90: failed courses
+        for position in range(start, min(stop, len(courses))):
+            if marks is not None:
+                marks.append((len(explanations), len(fired), self.total_credits))
+            course = courses[position]
+            code = course["code"]
+            if code in self.failed and code not in self.passed:
+                self.recommend_failed(course, code, current_semester)
+        # Salience 0: one rule per course at most, skipped once a Recommendation exists for its code
+        for position in range(max(start - len(courses), 0), stop - len(courses)):
+            if marks is not None:
+                marks.append((len(explanations), len(fired), self.total_credits))
+            course = courses[position]
+            code = course["code"]
+            cat = course["category"]
+            if code in self.recommended or code in self.passed:
+                continue
+            if course["semester_offered"] not in ["Both", current_semester]:
+                continue
+            course_sem = course["semester"]
+            if cat == "University Requirement" and code in NON_CREDIT_COURSES:
+                if course["credit_hours"] == 0 and semester <= 2 and course_sem <= 2:
+                    self.recommend(code, course, "Mandatory non-credit course")
+                    self.explanations.append(f"Recommended {code}: Mandatory non-credit course for first level.")
+                continue
+            if not (semester >= course_sem or abs(semester - course_sem) <= 1):
+                continue
+            if cat == "Core" or cat == "University Requirement":
+                self.recommend_mandatory(course, code, cat, semester, cgpa, total_credits)
+            elif is_elective(cat):
+                self.recommend_elective_placeholder(course, code, cat)
+
+    def rollback(self, position):
+        """Undo every activation fired from a firing position on; returns the undone run for update to reuse"""
+        undone = {"start": position, "marks": self.marks[position:], "end": len(self.marks),
+                  "total_credits": self.total_credits}
+        explanation_count, fired_count, self.total_credits = self.marks[position]
+        undone["explanations"] = self.explanations[explanation_count:]
+        undone["fired"] = [(code, first, self.reasons[code], self.elective_options.get(code))
+                           for code, first in self.fired[fired_count:]]
+        del self.marks[position:]
+        del self.explanations[explanation_count:]
+        for code, first in reversed(self.fired[fired_count:]):
+            self.recommendations.pop(0 if first else -1)
+            self.recommended.discard(code)
+            del self.reasons[code]
+            self.elective_options.pop(code, None)
+        del self.fired[fired_count:]
+        return undone
+
+    @staticmethod
+    def undone_state(undone, position):
+        """Explanation count, fired count and credits before a position of an undone run"""
+        if position < undone["end"]:
+            return undone["marks"][position - undone["start"]]
+        explanation_count, fired_count, _ = undone["marks"][0]
+        return (explanation_count + len(undone["explanations"]), fired_count + len(undone["fired"]),
+                undone["total_credits"])
+
+    def matches(self, undone, position):
+        """Whether the state before a position is the undone run's: same credits and same recommendations"""
+        _, fired_count, credits = self.undone_state(undone, position)
+        if credits != self.total_credits or fired_count != len(self.fired):
+            return False
+        base = undone["marks"][0][1]
+        return ({code for code, _ in self.fired[base:]} ==
+                {fired[0] for fired in undone["fired"][:fired_count - base]})
+
+    def replay(self, undone, start, stop):
+        """Append what the undone run fired from start up to stop, instead of firing those positions again"""
+        explanation_start, fired_start, _ = self.undone_state(undone, start)
+        explanation_stop, fired_stop, self.total_credits = self.undone_state(undone, stop)
+        base_explanations, base_fired, _ = undone["marks"][0]
+        marks = undone["marks"][start - undone["start"]:stop - undone["start"]]
+        shift = len(self.explanations) - explanation_start
+        if shift:
+            marks = [(explanation_count + shift, fired_count, credits)
+                     for explanation_count, fired_count, credits in marks]
+        self.marks.extend(marks)
+        self.explanations.extend(undone["explanations"][explanation_start - base_explanations:
+                                                        explanation_stop - base_explanations])
+        for code, first, reason, options in undone["fired"][fired_start - base_fired:fired_stop - base_fired]:
+            if first:
+                self.recommendations.insert(0, code)
+            else:
+                self.recommendations.append(code)
+            self.recommended.add(code)
+            self.reasons[code] = reason
+            if options is not None:
+                self.elective_options[code] = options
+            self.fired.append((code, first))
+
+    def update(self, passed, failed):
+        """Change the passed and failed courses of a resumable run, re-firing only what the change can affect;
+        returns the number of positions re-fired
+
+        Each position that depends on a changed course is re-fired. The positions after it depend on
+        the credits and recommendations before them, so they are re-fired too until the state
+        matches the previous run's again; up to the next dependent position, the previous run's
+        activations are then reused.
+        """
+        changed = (self.passed ^ passed) | (self.failed ^ failed)
+        affected = sorted({position for code in changed for position in self.compiled.change_index.get(code, ())})
+        self.profile = self.profile._replace(passed=passed, failed=failed)
+        self.passed = passed
+        self.failed = failed
+        if not affected:
+            return 0
+        end = len(self.marks)
+        undone = self.rollback(affected[0])
+        position = affected[0]
+        refired = 0
+        for next_affected in affected[1:] + [end]:
+            self.fire(position, position + 1)
+            position += 1
+            refired += 1
+            while position < next_affected:
+                if self.matches(undone, position):
+                    self.replay(undone, position, next_affected)
+                    position = next_affected
+                else:
+                    self.fire(position, position + 1)
+                    position += 1
+                    refired += 1
+        return refired
+
+    @timed_rule
+    def set_credit_limit(self, semester, cgpa, current_semester, passed, failed):
+        if current_semester == "Summer":
+            self.credit_limit = 9
+            self.explanations.append("Credit limit set to 9 for Summer semester.")
+        elif cgpa < 1.67 and semester >= 2:
+            self.credit_limit = 12
+            self.explanations.append(f"Credit limit set to 12 due to CGPA {cgpa} < 1.67 after 2 semesters.")
+        elif cgpa < 2.00 and semester >= 3:
+            self.credit_limit = 12
+            self.explanations.append(f"Credit limit set to 12 due to CGPA {cgpa} < 2.00 after 3 semesters.")
+        elif cgpa < 2.00:
+            self.credit_limit = 12
+            self.explanations.append(f"Credit limit set to 12 due to CGPA {cgpa} < 2.00.")
+        elif 2.00 <= cgpa < 3.00:
+            self.credit_limit = 20
+            self.explanations.append(f"Credit limit set to 20 due to CGPA {cgpa} between 2.00 and 2.99.")
+        else:
+            self.credit_limit = 22
+            self.explanations.append(f"Credit limit set to 22 due to CGPA {cgpa} >= 3.00.")
+        self.passed = passed
+        self.failed = failed
+
+    @timed_rule
+    def recommend_failed(self, course, code, current_semester):
+        credits = course["credit_hours"]
+        if code not in self.compiled.course_codes:
+            self.explanations.append(f"Not recommended {code}: Course not found in course database.")
+        elif code in self.recommended:
+            self.explanations.append(f"Not recommended {code}: Already recommended.")
+        elif course["semester_offered"] not in ["Both", current_semester]:
+            self.explanations.append(f"Not recommended {code}: Course not offered in {current_semester}.")
+        elif self.total_credits + credits <= self.credit_limit or credits == 0:
+            self.recommend(code, course, "Retake due to previous failure", first=True)
+            self.total_credits += credits
+            self.explanations.append(f"Prioritized {code}: Retake due to previous failure.")
+        else:
+            self.explanations.append(f"Not recommended {code}: Exceeds credit limit of {self.credit_limit} (current: {self.total_credits}).")
+
+    @timed_rule
+    def recommend_mandatory(self, course, code, cat, semester, cgpa, total_credits):
+        is_senior = semester >= 9 or total_credits >= SENIOR_CREDITS
+        # Same comparison as the rule: frozen prerequisites are a tuple, so this never matches
+        if course["prerequisites"] == ["SENIOR STANDING"] and not is_senior:
+            self.explanations.append(f"Not recommended {code}: Requires senior standing (Semester >= 9 or 125+ credits).")
+            return
+        prereqs_list = list(course["prerequisites"])
+        co_reqs_list = list(course["co_requisites"])
+        credits = course["credit_hours"]
+        if not all(prereq in self.passed for prereq in prereqs_list):
+            self.explanations.append(f"Not recommended {code}: Missing prerequisites {prereqs_list}.")
+        elif not all(co_req in self.passed or co_req in self.recommended for co_req in co_reqs_list):
+            self.explanations.append(f"Not recommended {code}: Missing co-requisites {co_reqs_list}.")
+        elif prereqs_list and cgpa < 2.00 and cat != "University Requirement":
+            self.explanations.append(f"Not recommended {code}: CGPA {cgpa} below 2.00 for advanced course.")
+        elif self.total_credits + credits <= self.credit_limit or credits == 0:
+            self.recommend(code, course, f"{cat} course, prerequisites met")
+            self.total_credits += credits
+            self.explanations.append(f"Recommended {code}: {cat} course, prerequisites {prereqs_list} met, CGPA {cgpa} sufficient.")
+        else:
+            self.explanations.append(f"Not recommended {code}: Exceeds credit limit of {self.credit_limit} (current: {self.total_credits}).")
 
-def recommend_courses(semester, cgpa, passed_courses, failed_courses, total_credits, current_semester):
+    @timed_rule
+    def recommend_elective_placeholder(self, course, code, cat):
+        credits = course["credit_hours"]
+        if self.total_credits + credits > self.credit_limit:
+            return
+        self.recommend(code, course, f"{cat} course required")
+        self.total_credits += credits
+        self.explanations.append(f"Recommended {code}: {cat} course required in Semester {course['semester']}.")
+        eligible = self.eligible_electives(cat, self.credit_limit - self.total_credits + credits)
+        self.elective_options[code] = eligible
+        if eligible:
+            self.explanations.append(f"Eligible courses for {code} ({cat}): {eligible}.")
+        else:
+            self.explanations.append(f"No eligible courses for {code} ({cat}) due to prerequisites or credit limit.")
+
+def profile_key(profile):
+    """Canonical StudentProfile: inputs the rules cannot tell apart map to the same key"""
+    return (
+        profile.semester,
+        bisect.bisect_right(CGPA_THRESHOLDS, profile.cgpa),
+        tuple(sorted(profile.passed)),
+        tuple(sorted(profile.failed)),
+        profile.total_credits >= SENIOR_CREDITS,  # Credits only matter for senior standing
+        profile.current_semester
+    )
+
+class RecommendationCache:
+    """LRU cache of recommend_course_details results keyed by profile_key"""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, cgpa):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        courses, elective_opts, exps, cached_cgpa = entry
+        if cgpa != cached_cgpa:
+            # Same band, so the same rules fired; only the CGPA quoted in the explanations differs
+            exps = [exp.replace(f"CGPA {cached_cgpa}", f"CGPA {cgpa}") for exp in exps]
+        return [dict(course) for course in courses], {code: list(opts) for code, opts in elective_opts.items()}, list(exps)
+
+    def put(self, key, cgpa, result):
+        if self.maxsize <= 0:
+            return
+        courses, elective_opts, exps = result
+        entry = (tuple(dict(course) for course in courses),
+                 {code: tuple(opts) for code, opts in elective_opts.items()}, tuple(exps), cgpa)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Timings of the last warm_up in milliseconds, or the error it stopped on
+warm_up_status = {}
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+def warm_up():
+    """Compile the catalog and ready one pooled engine, so the first request does not pay for either
+
+    Raises FileNotFoundError or ValueError when courses1.csv is missing or malformed.
+    """
+    start = time.perf_counter()
+    try:
+        compiled = get_compiled_catalog()
+        compiled_at = time.perf_counter()
+        with compiled.engine_pool.engine():
+            pass
+    except (FileNotFoundError, ValueError) as e:
+        warm_up_status.clear()
+        warm_up_status["error"] = str(e)
+        raise
+    warm_up_status.clear()
+    warm_up_status.update(time=time.time(), courses=len(compiled.course_facts),
+                          compile_ms=(compiled_at - start) * 1000,
+                          engine_ms=(time.perf_counter() - compiled_at) * 1000)
+    return compiled
+
+def warm_up_in_background():
+    """Run warm_up on a daemon thread unless one is already running; a failure is left to the first request"""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is not None and _warm_up_thread.is_alive():
+            return
+
+        def run():
+            try:
+                warm_up()
+            except (FileNotFoundError, ValueError):
+                pass
+
+        _warm_up_thread = threading.Thread(target=run, daemon=True)
+        _warm_up_thread.start()
+
+def use_fast_path():
+    return os.environ.get(FAST_PATH_ENV_VAR) == "1"
+
+def recommend_course_details(semester, cgpa, passed_courses, failed_courses, total_credits, current_semester,
+                             fast=None):
+    """Like recommend_courses, but each recommendation is a dict with code, name, credit_hours, category and reason
+
+    fast selects FastRecommender over the experta engine; by default $AIU_FAST_PATH decides.
+    """
     if current_semester not in ["Fall", "Spring", "Summer"]:
         raise ValueError("Current semester must be 'Fall', 'Spring', or 'Summer'.")
-    engine = CourseRecommender()
-    engine.reset()
-    engine.declare(Student(
-        semester=semester,
-        cgpa=cgpa,
-        passed=passed_courses,
-        failed=failed_courses,
-        credits=total_credits,
-        current_semester=current_semester
-    ))
-    engine.run()
-    return engine.get_recommendations()
+    fast = use_fast_path() if fast is None else fast
+    with profile_run(engine="fast" if fast else "experta") as run:
+        compiled = get_compiled_catalog()
+        profile = StudentProfile.build(semester, cgpa, passed_courses, failed_courses, total_credits, current_semester)
+        validate_profile(profile)  # Before the cache, so a profile is rejected whatever is cached
+        key = profile_key(profile)
+        cached = compiled.result_cache.get(key, cgpa)
+        if cached is not None:
+            if run is not None:
+                run["cache_hit"] = True
+            return cached
+        if fast:
+            engine = FastRecommender(compiled)
+            engine.run(profile)
+            result = engine.get_recommended_courses(), engine.elective_options, engine.explanations
+        else:
+            with compiled.engine_pool.engine() as engine:
+                engine.declare(student_fact(profile))
+                if run is not None:
+                    run["agenda_size"] = len(engine.agenda.activations)
+                engine.run()
+                if run is not None:
+                    run["facts"] = engine.declared_fact_counts()
+                result = engine.get_recommended_courses(), engine.elective_options, engine.explanations
+        compiled.result_cache.put(key, cgpa, result)
+        return result
+
+def recommend_courses(semester, cgpa, passed_courses, failed_courses, total_credits, current_semester, fast=None):
+    courses, elective_opts, exps = recommend_course_details(
+        semester, cgpa, passed_courses, failed_courses, total_credits, current_semester, fast)
+    return [course["code"] for course in courses], elective_opts, exps
+
+class RecommendationSession:
+    """One student's what-if exploration, keeping the engine's working memory between calls
+
+    When only the passed or failed courses change, the Student fact is updated in place. The fast
+    engine then re-fires from the first activation the changed courses can affect; experta replaces
+    the Student fact, which every activation is joined with, but keeps the course facts. Any other
+    change, or a new catalog version, starts a fresh run.
+    """
+    def __init__(self, fast=None):
+        self.fast = use_fast_path() if fast is None else fast
+        self.compiled = None
+        self.engine = None
+        self.profile = None
+        self.student = None  # The experta engine's Student fact
+        self.refired = 0  # Activations the last call fired
+
+    def recommend(self, semester, cgpa, passed_courses, failed_courses, total_credits, current_semester):
+        """Same results as recommend_course_details"""
+        if current_semester not in ["Fall", "Spring", "Summer"]:
+            raise ValueError("Current semester must be 'Fall', 'Spring', or 'Summer'.")
+        profile = StudentProfile.build(semester, cgpa, passed_courses, failed_courses, total_credits, current_semester)
+        with profile_run(engine="fast" if self.fast else "experta", session=True) as run:
+            compiled = get_compiled_catalog()
+            if compiled is not self.compiled or self.profile is None or (
+                    profile._replace(passed=None, failed=None) != self.profile._replace(passed=None, failed=None)):
+                self.start(compiled, profile)
+            elif profile != self.profile:
+                self.update(profile)
+            else:
+                self.refired = 0
+            if run is not None:
+                run["refired"] = self.refired
+            self.profile = profile
+            engine = self.engine
+            return (engine.get_recommended_courses(), {code: list(opts) for code, opts in engine.elective_options.items()},
+                    list(engine.explanations))
+
+    def start(self, compiled, profile):
+        self.profile = None  # Until the run succeeds
+        if self.fast:
+            engine = FastRecommender(compiled)
+            engine.run(profile, resumable=True)
+            self.refired = len(engine.marks)
+        else:
+            validate_profile(profile)
+            if compiled is not self.compiled:
+                engine = CourseRecommender(compiled)
+                engine.warm_up()
+            else:
+                engine = self.engine
+                engine.retract_session()
+            self.student = engine.declare(student_fact(profile))
+            self.refired = len(engine.agenda.activations)
+            engine.run()
+        self.compiled = compiled
+        self.engine = engine
+
+    def update(self, profile):
+        self.profile = None
+        if self.fast:
+            self.refired = self.engine.update(profile.passed, profile.failed)
+        else:
+            self.student = self.engine.modify_student(self.student, passed=profile.passed, failed=profile.failed)
+            self.refired = len(self.engine.agenda.activations)
+            self.engine.run()
 
 if __name__ == "__main__":
     recs, elective_opts, exps = recommend_courses(
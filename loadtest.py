@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from benchmark import SAMPLE_STUDENT
+from service import DEFAULT_PORT
+
+PERCENTILES = [50, 90, 95, 99]
+
+def make_profiles(distinct, seed=0):
+    """Variations of the sample student; a small pool makes concurrent duplicates, as a cohort does"""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(distinct):
+        profile = dict(SAMPLE_STUDENT)
+        profile["cgpa"] = round(1.0 + 3.0 * i / max(distinct - 1, 1), 2)
+        profile["current_semester"] = rng.choice(["Fall", "Spring"])
+        profile["passed_courses"] = [code for code in SAMPLE_STUDENT["passed_courses"] if rng.random() < 0.8]
+        profiles.append(profile)
+    return profiles
+
+class Client:
+    """A minimal HTTP/1.1 keep-alive client, standing in for the portal or a batch job"""
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+                          .encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = json.loads(await self.reader.readexactly(int(headers.get("content-length", 0))))
+        if headers.get("connection") == "close":
+            self.close()
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+async def wait_until_up(host, port, timeout):
+    deadline = time.perf_counter() + timeout
+    while True:
+        client = Client(host, port)
+        try:
+            status, data = await client.request("GET", "/health")
+            return data
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+        finally:
+            client.close()
+
+async def run_load(host, port, connections, requests, profiles):
+    """Send requests POST /recommend calls over the given number of connections; per-call latencies in ms"""
+    queue = [profiles[i % len(profiles)] for i in range(requests)]
+    random.Random(1).shuffle(queue)
+    timings = []
+    failures = []
+
+    async def worker():
+        client = Client(host, port)
+        try:
+            while queue:
+                profile = queue.pop()
+                start = time.perf_counter()
+                status, data = await client.request("POST", "/recommend", profile)
+                timings.append((time.perf_counter() - start) * 1000)
+                if status != 200:
+                    failures.append(f"{status}: {data.get('error')}")
+        finally:
+            client.close()
+
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    return timings, failures
+
+def report(timings, failures, elapsed, before, after):
+    timings = sorted(timings)
+    percentiles = "   ".join(f"p{p} {timings[max(int(len(timings) * p / 100) - 1, 0)]:8.1f} ms"
+                               for p in PERCENTILES)
+    print(f"{len(timings)} requests in {elapsed:.2f} s ({len(timings) / elapsed:.0f} req/s), {len(failures)} failed")
+    print(f"Latency   {percentiles}")
+    runs = after["engine_runs"] - before["engine_runs"]
+    coalesced = after["coalesced"] - before["coalesced"]
+    print(f"Engine runs {runs}, coalesced {coalesced} ({coalesced / max(len(timings), 1):.0%} of requests)")
+    for failure in sorted(set(failures))[:5]:
+        print(f"  {failure}")
+
+async def load_test(args):
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+    await wait_until_up(host, port, args.startup_timeout)
+    profiles = make_profiles(args.distinct)
+    client = Client(host, port)
+    try:
+        # Let every worker process compile the catalog before timing starts
+        await run_load(host, port, args.connections, args.connections, profiles)
+        _, before = await client.request("GET", "/health")
+        start = time.perf_counter()
+        timings, failures = await run_load(host, port, args.connections, args.requests, profiles)
+        elapsed = time.perf_counter() - start
+        _, after = await client.request("GET", "/health")
+    finally:
+        client.close()
+    report(timings, failures, elapsed, before, after)
+    return 1 if failures else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the recommendation service with concurrent clients.")
+    parser.add_argument("--url", help="A running service to test, e.g. http://127.0.0.1:8502 "
+                                      "(default: start one on --port)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT + 1, help="Port for the service this script starts")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the service this script starts")
+    parser.add_argument("--connections", type=int, default=50, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=2000, help="Total /recommend requests")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct student profiles in the mix")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for the service")
+    args = parser.parse_args(argv)
+
+    server = None
+    if not args.url:
+        command = [sys.executable, "service.py", "--port", str(args.port)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        return asyncio.run(load_test(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-import os
+import students
 
 class LoginPage:
     def __init__(self):
@@ -13,16 +12,8 @@ class LoginPage:
     def load_student_data(self, student_id):
         """Load student data from students.csv based on ID."""
         try:
-            path = os.path.join(os.path.dirname(__file__), "students.csv")
-            students_df = pd.read_csv(path)
-            student_data = students_df[students_df["id"] == int(student_id)]
-            if student_data.empty:
-                return None
-            student = student_data.iloc[0]
-            return {
-                "name": student["name"],
-                "id": student["id"]
-            }
+            # Cached by students.csv's mtime and size, so a login is a dict lookup
+            return students.get_student(student_id)
         except FileNotFoundError:
             st.error("students.csv not found. Please ensure the file exists.")
             return None
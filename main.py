@@ -2,11 +2,14 @@ import streamlit as st
 from app import student_ui
 from admin_interface import admin_ui
 from login import login_page
+from inference import warm_up_in_background
 
 
 def main():
     if not st.session_state.logged_in:
         login_page()
+        # Compile the catalog while the user logs in; the login page never waits for it
+        warm_up_in_background()
     else:
         if st.session_state.user_type == "Student":
             student_ui()
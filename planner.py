@@ -0,0 +1,241 @@
+import argparse
+import bisect
+import math
+import time
+
+from inference import (BAND_CREDIT_LIMITS, CGPA_THRESHOLDS, SENIOR_CREDITS, SUMMER_CREDIT_LIMIT,
+                       get_compiled_catalog, is_elective)
+from prereq_graph import SENIOR_STANDING, requisite_codes
+
+# Semester number from which a student has senior standing, as in recommend_mandatory
+SENIOR_SEMESTER = 9
+
+# Plans longer than this are not searched for
+MAX_TERMS = 24
+
+def is_required(category):
+    return category in ("Core", "University Requirement") or is_elective(category)
+
+class PlanCourse:
+    __slots__ = ("code", "credits", "seasons", "prereqs", "co_reqs", "senior", "semester")
+
+    def __init__(self, code, credits, seasons, prereqs, co_reqs, senior, semester):
+        self.code = code
+        self.credits = credits
+        self.seasons = seasons
+        self.prereqs = prereqs
+        self.co_reqs = co_reqs
+        self.senior = senior
+        self.semester = semester  # Semester of the study plan; recommend_mandatory allows it one semester early
+
+class DegreePlan:
+    """Terms from the next semester to graduation; optimal is False when the time budget ran out first"""
+    def __init__(self, terms, optimal, lower_bound, elapsed, unreachable=()):
+        self.terms = terms  # [{"semester", "season", "courses", "credits"}]
+        self.optimal = optimal
+        self.lower_bound = lower_bound
+        self.elapsed = elapsed
+        self.unreachable = list(unreachable)
+
+    @property
+    def feasible(self):
+        return self.terms is not None
+
+class DegreePlanner:
+    """Shortest sequence of semesters that completes every Core, University Requirement and elective slot
+    listed in courses1.csv
+
+    Depth-first branch and bound over terms. Each term takes a maximal set of courses that are
+    offered that season, have their prerequisites done, are at most one semester ahead of the
+    study plan, as in recommend_mandatory, and fit the CGPA-based credit limit;
+    taking more never makes a later term worse, so smaller sets are not explored. States already
+    reached at the same depth are skipped, and a branch is cut when its terms so far plus a lower
+    bound on the terms left cannot beat the best plan found. The bound is the larger of the
+    remaining credits over the credit limit and the prerequisite depth: the earliest term each
+    course could be taken with unlimited credits, given the seasons it is offered in and its
+    semester. A Summer term keeps the semester number of the Spring before it.
+    """
+    def __init__(self, compiled=None, include_summer=False):
+        compiled = compiled or get_compiled_catalog()
+        self.seasons = ["Fall", "Spring", "Summer"] if include_summer else ["Fall", "Spring"]
+        self.courses = {}
+        for fact in compiled.courses_by_code.values():
+            if not is_required(fact["category"]):
+                continue
+            prereqs = requisite_codes(fact["prerequisites"])
+            offered = fact["semester_offered"]
+            self.courses[fact["code"]] = PlanCourse(
+                fact["code"], fact["credit_hours"],
+                frozenset(["Fall", "Spring"] if offered == "Both" else [offered]) | (
+                    frozenset(["Summer"]) if offered == "Both" and include_summer else frozenset()),
+                tuple(code for code in prereqs if code != SENIOR_STANDING),
+                tuple(requisite_codes(fact["co_requisites"])),
+                SENIOR_STANDING in prereqs, fact["semester"])
+        graph = compiled.catalog.prerequisite_graph()
+        if graph.cycle:
+            raise ValueError(f"Prerequisite cycle: {' -> '.join(graph.cycle)}.")
+        self.order = [code for code in graph.order if code in self.courses]
+        # Critical chain of each course, to take bottleneck courses first
+        self.tail = graph.critical
+
+    def plan(self, semester, current_semester, cgpa, passed_courses=(), total_credits=None, time_budget=2.0):
+        """Plan from the term the student is entering: semester number and Fall/Spring/Summer
+
+        total_credits counts towards senior standing; by default, the credits of the passed courses.
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_budget
+        self.semesters = [semester]  # By term, filled in as terms are reached
+        self.start_season = self.seasons.index(current_semester) if current_semester in self.seasons else 0
+        self.limit = BAND_CREDIT_LIMITS[bisect.bisect_right(CGPA_THRESHOLDS, cgpa)]
+        passed = frozenset(passed_courses)
+        remaining = frozenset(code for code in self.courses if code not in passed)
+
+        unreachable = self.unreachable(remaining, passed)
+        if unreachable:
+            return DegreePlan(None, True, None, time.perf_counter() - start, unreachable)
+        self.best = None
+        self.seen = set()
+        self.timed_out = False
+        lower_bound = self.lower_bound(remaining, 0)
+        if total_credits is None:
+            total_credits = sum(self.courses[code].credits for code in passed if code in self.courses)
+        self.search(remaining, passed, [], lower_bound, total_credits)
+        terms = None
+        if self.best is not None:
+            terms = [{"semester": self.semester(i), "season": self.season(i), "courses": sorted(courses),
+                      "credits": sum(self.courses[code].credits for code in courses)}
+                     for i, courses in enumerate(self.best)]
+        return DegreePlan(terms, not self.timed_out, lower_bound, time.perf_counter() - start)
+
+    def season(self, term):
+        return self.seasons[(self.start_season + term) % len(self.seasons)]
+
+    def semester(self, term):
+        """Semester number of a term: each Fall and Spring after the first term starts the next one"""
+        while len(self.semesters) <= term:
+            self.semesters.append(self.semesters[-1] + (self.season(len(self.semesters)) != "Summer"))
+        return self.semesters[term]
+
+    def in_window(self, course, term):
+        return self.semester(term) >= course.semester - 1
+
+    def credit_limit(self, term):
+        return SUMMER_CREDIT_LIMIT if self.season(term) == "Summer" else self.limit
+
+    def unreachable(self, remaining, passed):
+        """Remaining courses that no plan can complete: never offered, or needing a course outside the plan"""
+        blocked = []
+        for code in self.order:
+            if code not in remaining:
+                continue
+            course = self.courses[code]
+            if not course.seasons & set(self.seasons) or any(
+                    prereq not in passed and (prereq not in self.courses or prereq in blocked)
+                    for prereq in course.prereqs + course.co_reqs):
+                blocked.append(code)
+        return blocked
+
+    def lower_bound(self, remaining, term):
+        """Terms still needed from term on, ignoring every constraint but prerequisites, seasons and credits"""
+        if not remaining:
+            return 0
+        earliest = {}
+        for code in self.order:
+            if code not in remaining:
+                continue
+            course = self.courses[code]
+            t = max([earliest[prereq] + 1 for prereq in course.prereqs if prereq in earliest], default=term)
+            while self.season(t) not in course.seasons or not self.in_window(course, t):
+                t += 1
+            earliest[code] = t
+        depth = max(earliest.values()) + 1 - term
+        credits = sum(self.courses[code].credits for code in remaining)
+        return max(depth, math.ceil(credits / max(self.limit, 1)))
+
+    def is_senior(self, term, completed_credits):
+        return self.semester(term) >= SENIOR_SEMESTER or completed_credits >= SENIOR_CREDITS
+
+    def term_options(self, remaining, completed, term, credits_done):
+        """Maximal sets of courses to take in a term, most critical courses first"""
+        season = self.season(term)
+        senior = self.is_senior(term, credits_done)
+        available = [self.courses[code] for code in remaining
+                     if season in self.courses[code].seasons
+                     and all(prereq in completed for prereq in self.courses[code].prereqs)
+                     and self.in_window(self.courses[code], term)
+                     and (senior or not self.courses[code].senior)]
+        available.sort(key=lambda course: (-self.tail[course.code], -course.credits, course.code))
+        limit = self.credit_limit(term)
+
+        def subsets(i, chosen, credits):
+            if i == len(available):
+                # Maximal: no skipped course would still fit
+                if all(course in chosen or credits + course.credits > limit for course in available):
+                    yield chosen
+                return
+            course = available[i]
+            if credits + course.credits <= limit:
+                yield from subsets(i + 1, chosen + [course], credits + course.credits)
+            if course.credits > 0:  # A zero-credit course always fits, so every maximal set takes it
+                yield from subsets(i + 1, chosen, credits)
+
+        for chosen in subsets(0, [], 0):
+            codes = {course.code for course in chosen}
+            if all(co_req in completed or co_req in codes for course in chosen for co_req in course.co_reqs):
+                yield codes
+
+    def search(self, remaining, completed, terms, lower_bound, credits_done):
+        if not remaining:
+            if self.best is None or len(terms) < len(self.best):
+                self.best = list(terms)
+            return
+        term = len(terms)
+        if self.best is not None and term + lower_bound >= len(self.best):
+            return
+        if term >= MAX_TERMS or (remaining, term) in self.seen:
+            return
+        self.seen.add((remaining, term))
+        if time.perf_counter() > self.deadline and self.best is not None:
+            self.timed_out = True
+            return
+        progressed = False
+        for codes in self.term_options(remaining, completed, term, credits_done):
+            if not codes:
+                continue
+            progressed = True
+            next_remaining = remaining - codes
+            self.search(next_remaining, completed | codes, terms + [codes], self.lower_bound(next_remaining, term + 1),
+                        credits_done + sum(self.courses[code].credits for code in codes))
+            if self.timed_out:
+                return
+        if not progressed:
+            # Nothing can be taken this term, e.g. everything left is offered next season
+            self.search(remaining, completed, terms + [set()], self.lower_bound(remaining, term + 1), credits_done)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shortest semester-by-semester plan to graduation.")
+    parser.add_argument("--semester", type=int, default=1, help="Semester number the student is entering")
+    parser.add_argument("--season", choices=["Fall", "Spring", "Summer"], default="Fall")
+    parser.add_argument("--cgpa", type=float, default=3.0)
+    parser.add_argument("--passed", default="", help="Comma-separated passed course codes")
+    parser.add_argument("--summer", action="store_true", help="Allow Summer terms")
+    parser.add_argument("--budget", type=float, default=2.0, help="Search time budget in seconds")
+    args = parser.parse_args(argv)
+
+    passed = [code.strip() for code in args.passed.split(",") if code.strip()]
+    plan = DegreePlanner(include_summer=args.summer).plan(args.semester, args.season, args.cgpa, passed,
+                                                          time_budget=args.budget)
+    if not plan.feasible:
+        print(f"No plan can complete: {', '.join(plan.unreachable)}")
+        return
+    for term in plan.terms:
+        print(f"Semester {term['semester']} ({term['season']}, {term['credits']:g} credits): "
+              f"{', '.join(term['courses']) or 'no courses offered'}")
+    status = "optimal" if plan.optimal else "best found within the time budget"
+    summers = sum(term["season"] == "Summer" for term in plan.terms)
+    length = f"{len(plan.terms) - summers} semesters" + (f" and {summers} Summer terms" if summers else "")
+    print(f"{length} ({status}; lower bound {plan.lower_bound} terms, {plan.elapsed * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import re
+from collections import deque
+
+SENIOR_STANDING = "SENIOR STANDING"
+
+def requisite_codes(requisites):
+    """Requisite codes of a course; a cell such as "MAT212 & MAT112 & CSE015" names all three"""
+    return [code.strip() for requisite in requisites for code in re.split(r"\s*&\s*", requisite) if code.strip()]
+
+class PrerequisiteGraph:
+    """The catalog's prerequisite relation, computed once per catalog version
+
+    Holds a topological order, any cycle, each course's transitive prerequisites as an int
+    bitset over self.index, and its critical chain: the number of courses on the longest
+    prerequisite path from it to the end of the degree, itself included. Codes that are only
+    named as prerequisites are nodes too, so lookups never fail on them.
+    """
+    def __init__(self, courses):
+        """courses: (code, prerequisites) pairs, prerequisites as parse_course_list returns them"""
+        self.prereqs = {}
+        self.senior = set()  # Courses that also require senior standing
+        for code, prerequisites in courses:
+            if code in self.prereqs:
+                continue
+            codes = requisite_codes(prerequisites)
+            if SENIOR_STANDING in codes:
+                self.senior.add(code)
+            self.prereqs[code] = tuple(dict.fromkeys(prereq for prereq in codes if prereq != SENIOR_STANDING))
+        self.courses = frozenset(self.prereqs)
+        external = sorted({prereq for prereqs in self.prereqs.values() for prereq in prereqs} - self.courses)
+        for code in external:
+            self.prereqs[code] = ()
+        self.codes = list(self.prereqs)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.dependents = {code: [] for code in self.codes}
+        for code, prereqs in self.prereqs.items():
+            for prereq in prereqs:
+                self.dependents[prereq].append(code)
+        self.order, self.cycle = self.topological_order()
+        self.closure = self.transitive_closure()
+        self.critical = {}
+        for code in reversed(self.order):
+            self.critical[code] = 1 + max((self.critical[dependent] for dependent in self.dependents[code]
+                                           if dependent in self.critical), default=0)
+
+    def topological_order(self):
+        """Kahn's algorithm; returns the order of every course not on a cycle, and one cycle or None"""
+        indegree = {code: len(prereqs) for code, prereqs in self.prereqs.items()}
+        ready = deque(code for code in self.codes if indegree[code] == 0)
+        order = []
+        while ready:
+            code = ready.popleft()
+            order.append(code)
+            for dependent in self.dependents[code]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) == len(self.codes):
+            return order, None
+        # Every course left has a prerequisite left, so following them must loop
+        left = {code for code in self.codes if indegree[code] > 0}
+        path = [next(code for code in self.codes if code in left)]
+        seen = {path[0]: 0}
+        while True:
+            code = next(prereq for prereq in self.prereqs[path[-1]] if prereq in left)
+            if code in seen:
+                return order, path[seen[code]:] + [code]
+            seen[code] = len(path)
+            path.append(code)
+
+    def transitive_closure(self):
+        closure = [0] * len(self.codes)
+        for code in self.order:
+            bits = 0
+            for prereq in self.prereqs[code]:
+                i = self.index[prereq]
+                bits |= closure[i] | (1 << i)
+            closure[self.index[code]] = bits
+        if self.cycle:
+            # Courses on or behind a cycle: breadth-first search instead
+            ordered = set(self.order)
+            for code in self.codes:
+                if code in ordered:
+                    continue
+                bits = 0
+                queue = deque(self.prereqs[code])
+                while queue:
+                    i = self.index[queue.popleft()]
+                    if not bits & (1 << i):
+                        bits |= 1 << i
+                        queue.extend(self.prereqs[self.codes[i]])
+                closure[self.index[code]] = bits
+        return closure
+
+    def requires(self, code, prereq):
+        """Whether prereq is a direct or indirect prerequisite of code"""
+        if code not in self.index or prereq not in self.index:
+            return False
+        return bool(self.closure[self.index[code]] >> self.index[prereq] & 1)
+
+    def all_prerequisites(self, code):
+        if code not in self.index:
+            return set()
+        bits = self.closure[self.index[code]]
+        return {self.codes[i] for i in range(bits.bit_length()) if bits >> i & 1}
+
+    def prerequisite_errors(self, code, prerequisites):
+        """Problems with giving code these prerequisites: unknown codes, itself, or a cycle"""
+        errors = []
+        for prereq in requisite_codes(prerequisites):
+            if prereq == SENIOR_STANDING:
+                continue
+            if prereq == code:
+                errors.append(f"{code} cannot be its own prerequisite")
+            elif prereq not in self.courses:
+                errors.append(f"{prereq} is not in the catalog")
+            elif self.requires(prereq, code):
+                errors.append(f"{prereq} already requires {code}, which would create a cycle")
+        return errors
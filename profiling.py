@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+# Set to 1 to profile recommendation runs in memory, or to a file path to also append them there as JSON lines
+PROFILE_ENV_VAR = "AIU_PROFILE"
+
+# Most recent runs kept in memory for the admin panel
+HISTORY_SIZE = 5000
+
+PERCENTILES = [50, 90, 95, 99]
+
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_local = threading.local()
+_enabled = None  # None follows $AIU_PROFILE; enable() overrides it for this process
+
+def enabled():
+    return bool(os.environ.get(PROFILE_ENV_VAR)) if _enabled is None else _enabled
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+def metrics_path():
+    """File runs are appended to, or None"""
+    value = os.environ.get(PROFILE_ENV_VAR)
+    return value if value and value != "1" else None
+
+def current_run():
+    return getattr(_local, "run", None)
+
+@contextmanager
+def profile_run(**fields):
+    """Record one recommendation run; yields the run dict, or None when profiling is off"""
+    if not enabled():
+        yield None
+        return
+    run = {"time": time.time(), **fields, "rules": {}, "facts": {}, "agenda_size": 0}
+    _local.run = run
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run["latency_ms"] = (time.perf_counter() - start) * 1000
+        _local.run = None
+        record(run)
+
+def record(run):
+    with _history_lock:
+        _history.append(run)
+        path = metrics_path()
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(run) + "\n")
+
+def history():
+    with _history_lock:
+        return list(_history)
+
+def clear_history():
+    with _history_lock:
+        _history.clear()
+
+def load_metrics(path):
+    """Runs from a metrics file, skipping a torn last line"""
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+    return runs
+
+def rule_stats(run, name):
+    return run["rules"].setdefault(name, {"activations": 0, "body_ms": 0.0, "tests": 0, "test_ms": 0.0})
+
+def timed_rule(func):
+    """Count and time a rule body in the current run"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        run = current_run()
+        if run is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats = rule_stats(run, func.__name__)
+            stats["activations"] += 1
+            stats["body_ms"] += (time.perf_counter() - start) * 1000
+    return wrapper
+
+def timed_test(rule_name, test):
+    """Count and time a rule's TEST condition in the current run; keeps the test's signature for experta"""
+    @wraps(test)
+    def wrapper(**kwargs):
+        run = current_run()
+        if run is None:
+            return test(**kwargs)
+        start = time.perf_counter()
+        try:
+            return test(**kwargs)
+        finally:
+            stats = rule_stats(run, rule_name)
+            stats["tests"] += 1
+            stats["test_ms"] += (time.perf_counter() - start) * 1000
+    return wrapper
+
+def latency_percentiles(runs):
+    """Latency percentiles in milliseconds per engine, cache hits counted separately"""
+    if not runs:
+        return pd.DataFrame()
+    df = pd.DataFrame([{"path": "cache" if run.get("cache_hit") else run.get("engine", ""),
+                        "latency_ms": run["latency_ms"]} for run in runs])
+    table = df.groupby("path")["latency_ms"].describe(percentiles=[p / 100 for p in PERCENTILES])
+    return table.rename(columns={f"{p}%": f"p{p}" for p in PERCENTILES})
+
+def rule_percentiles(runs):
+    """Per-rule activations, tests and milliseconds per run, as percentiles over the runs that used the rule"""
+    rows = [{"rule": name, **stats} for run in runs for name, stats in run.get("rules", {}).items()]
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows).groupby("rule").quantile([p / 100 for p in PERCENTILES]).unstack()
+    table.columns = [f"{metric} p{round(q * 100)}" for metric, q in table.columns]
+    return table
+
+def run_summary(runs):
+    """Facts declared and initial agenda size per experta engine run, as percentiles"""
+    rows = [{"agenda_size": run.get("agenda_size", 0), **run.get("facts", {})}
+            for run in runs if run.get("engine") == "experta" and not run.get("cache_hit")]
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows).fillna(0).quantile([p / 100 for p in PERCENTILES])
+    table.index = [f"p{p}" for p in PERCENTILES]
+    return table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a recommendation metrics file.")
+    parser.add_argument("path", nargs="?", default=metrics_path(), help=f"Metrics file (default: ${PROFILE_ENV_VAR})")
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error(f"no metrics file given and ${PROFILE_ENV_VAR} is not a path")
+
+    runs = load_metrics(args.path)
+    print(f"{len(runs)} runs")
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(latency_percentiles(runs))
+        print(rule_percentiles(runs))
+        print(run_summary(runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import sys
+from typing import NamedTuple
+
+def intern_code(code):
+    """One shared string per course code, so the catalog, facts and student sets do not each hold a copy"""
+    return sys.intern(code) if isinstance(code, str) else code
+
+def intern_codes(codes):
+    return tuple(intern_code(code) for code in codes)
+
+class CourseRecord(NamedTuple):
+    """A typed catalog course; requisites are tuples of interned codes"""
+    code: str
+    name: str
+    description: str
+    prerequisites: tuple
+    co_requisites: tuple
+    credit_hours: float
+    semester_offered: str
+    semester: int  # None when the file's Semester cell is not a number
+    category: str
+    file_category: str
+
+class StudentProfile(NamedTuple):
+    """The inputs of one recommendation request, with course codes interned into frozensets"""
+    semester: int
+    cgpa: float
+    passed: frozenset
+    failed: frozenset
+    total_credits: int
+    current_semester: str
+
+    @classmethod
+    def build(cls, semester, cgpa, passed_courses, failed_courses, total_credits, current_semester):
+        return cls(semester, cgpa, frozenset(map(intern_code, passed_courses)),
+                   frozenset(map(intern_code, failed_courses)), total_credits, current_semester)
@@ -0,0 +1,152 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+from catalog import CSV_FILES, catalog_signature, get_catalog
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Code parts, so "111" and "cse" both find CSE111
+CODE_PART_PATTERN = re.compile(r"[^\W\d_]+|\d+")
+
+# How much one occurrence of a word counts in each field
+FIELD_WEIGHTS = {"code": 4.0, "name": 2.0, "description": 1.0}
+
+# A query word that only begins a course's word counts this much of a whole-word match
+PREFIX_WEIGHT = 0.5
+
+# Ties rank by code, then in category file order
+CATEGORY_ORDER = {category: n for n, category in enumerate(CSV_FILES)}
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+def course_terms(record):
+    """Each word of a course with its weight: field weights summed, repeats within a field damped"""
+    code = record.code.lower()
+    fields = {"code": [code] + [part for part in CODE_PART_PATTERN.findall(code) if part != code],
+              "name": tokenize(record.name), "description": tokenize(record.description)}
+    terms = {}
+    for field, tokens in fields.items():
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            terms[token] = terms.get(token, 0.0) + FIELD_WEIGHTS[field] * (1 + math.log(count))
+    return terms
+
+class CourseIndex:
+    """Inverted index over course codes, names and descriptions, keyed by (file category, code)
+
+    Query words match whole words and, at a lower weight, the start of longer ones, so results
+    narrow as the user types. A course must match every query word; results are ranked by
+    weight times rarity, as in TF-IDF.
+    """
+    def __init__(self, records=()):
+        self.records = {}
+        self.terms = {}  # key -> {word: weight}
+        self.postings = {}  # word -> {key: weight}
+        for record in records:
+            self.index(record)
+        self.vocabulary = sorted(self.postings)  # For prefix lookups
+
+    def __len__(self):
+        return len(self.records)
+
+    def index(self, record):
+        key = (record.file_category, record.code)
+        self.records[key] = record
+        self.terms[key] = course_terms(record)
+        for word, weight in self.terms[key].items():
+            self.postings.setdefault(word, {})[key] = weight
+
+    def add(self, record):
+        """Index a new or changed course"""
+        self.remove((record.file_category, record.code))
+        new_words = [word for word in course_terms(record) if word not in self.postings]
+        self.index(record)
+        for word in new_words:
+            insort(self.vocabulary, word)
+
+    def remove(self, key):
+        if key not in self.records:
+            return
+        del self.records[key]
+        for word in self.terms.pop(key):
+            postings = self.postings[word]
+            del postings[key]
+            if not postings:
+                del self.postings[word]
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+
+    def expand(self, word):
+        """Indexed words starting with word, each with its match weight"""
+        for position in range(bisect_left(self.vocabulary, word), len(self.vocabulary)):
+            indexed = self.vocabulary[position]
+            if not indexed.startswith(word):
+                break
+            yield indexed, 1.0 if indexed == word else PREFIX_WEIGHT
+
+    def search(self, query, categories=None, limit=20):
+        """Courses matching every word of query, best first; limit None returns them all"""
+        scores = None
+        for word in set(tokenize(query)):
+            word_scores = {}
+            for indexed, match in self.expand(word):
+                postings = self.postings[indexed]
+                rarity = math.log(1 + len(self.records) / len(postings))
+                for key, weight in postings.items():
+                    score = weight * match * rarity
+                    if score > word_scores.get(key, 0.0):
+                        word_scores[key] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {key: score + word_scores[key] for key, score in scores.items() if key in word_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        if categories is not None:
+            scores = {key: score for key, score in scores.items() if key[0] in categories}
+        rank = lambda key: (-scores[key], key[1], CATEGORY_ORDER[key[0]])
+        ranked = sorted(scores, key=rank) if limit is None else heapq.nsmallest(limit, scores, key=rank)
+        return [self.records[key] for key in ranked]
+
+_index = None
+_index_signature = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """The index of the current catalog, rebuilt when the catalog files change other than through record_change"""
+    global _index, _index_signature
+    signature = catalog_signature()
+    with _index_lock:
+        if _index is None or signature != _index_signature:
+            catalog = get_catalog()
+            _index = CourseIndex(record for records in catalog.records.values() for record in records)
+            _index_signature = signature
+        return _index
+
+def search(query, categories=None, limit=20):
+    index = get_index()
+    with _index_lock:
+        return index.search(query, categories, limit)
+
+def record_change(signature, removed=(), added=()):
+    """Carry the index over a catalog write this process made, instead of rebuilding it
+
+    signature is catalog_signature() from before the write; if the index was not current then,
+    it is left to be rebuilt on the next search.
+    """
+    global _index_signature
+    with _index_lock:
+        if _index is None or signature != _index_signature:
+            return
+        for key in removed:
+            _index.remove(key)
+        for record in added:
+            _index.add(record)
+        _index_signature = catalog_signature()
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import students
+from batch import directory_student
+from catalog import CSV_FILES, get_catalog
+from inference import recommend_course_details, warm_up
+
+DEFAULT_PORT = 8502  # Next to Streamlit's 8501
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 10 * 2 ** 20
+
+PROFILE_FIELDS = ["semester", "cgpa", "passed_courses", "failed_courses", "total_credits", "current_semester"]
+
+# JSON types of the scalar profile fields, with how errors describe them
+FIELD_TYPES = {"semester": (int, "an integer"), "cgpa": ((int, float), "a number"),
+               "total_credits": (int, "an integer"), "current_semester": (str, "a string")}
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def body_length(headers):
+    """The request body's size from its Content-Length; raises HTTPError when the body cannot be read"""
+    if "chunked" in headers.get("transfer-encoding", ""):
+        raise HTTPError(411, "Send a Content-Length instead of a chunked body.")
+    value = headers.get("content-length", "0").strip() or "0"
+    if not (value.isascii() and value.isdigit()):
+        raise HTTPError(400, f"Invalid Content-Length: {value!r}.")
+    length = int(value)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, f"Request body over {MAX_BODY_SIZE} bytes.")
+    return length
+
+def start_worker():
+    """Pool initializer: compile the catalog and warm an engine before the first request arrives"""
+    try:
+        warm_up()
+    except (FileNotFoundError, ValueError):
+        pass  # Each request reports the problem instead
+
+def run_recommendation(profile, fast):
+    """Runs in a worker process"""
+    courses, elective_opts, exps = recommend_course_details(**profile, fast=fast)
+    return {"recommendations": courses, "elective_options": elective_opts, "explanations": exps}
+
+def parse_profile(data):
+    """The recommend_course_details arguments from a request object, type-checked so a bad value is a 400
+    rather than an engine error; ranges are left to the engine"""
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Expected a JSON object.")
+    missing = [field for field in PROFILE_FIELDS if field not in data and field != "failed_courses"]
+    if missing:
+        raise HTTPError(400, f"Missing fields: {', '.join(missing)}.")
+    profile = {field: data.get(field, []) for field in PROFILE_FIELDS}
+    for field in ["passed_courses", "failed_courses"]:
+        if not isinstance(profile[field], list) or not all(isinstance(code, str) for code in profile[field]):
+            raise HTTPError(400, f"{field} must be a list of course codes.")
+    for field, (types, description) in FIELD_TYPES.items():
+        if isinstance(profile[field], bool) or not isinstance(profile[field], types):
+            raise HTTPError(400, f"{field} must be {description}.")
+    profile["cgpa"] = float(profile["cgpa"])  # JSON encoders may write 3.0 as 3
+    return profile
+
+def parse_fast(data):
+    """Optional engine choice: true for FastRecommender, false for experta, absent for $AIU_FAST_PATH"""
+    fast = data.get("fast")
+    if fast not in (None, True, False):
+        raise HTTPError(400, "fast must be true, false or omitted.")
+    return fast
+
+def advice_result(student_id, name=""):
+    return {"id": student_id, "name": name, "recommendations": [], "elective_options": {}, "explanations": [],
+            "error": ""}
+
+def course_json(record):
+    return record._asdict()
+
+class RecommendationService:
+    """Routes requests to handlers; engine runs go to a process pool, and concurrent requests for the same
+    profile share one run"""
+    def __init__(self, workers=None, executor=None):
+        self.executor = executor or ProcessPoolExecutor(
+            workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"), initializer=start_worker)
+        self.in_flight = {}
+        self.stats = {"requests": 0, "engine_runs": 0, "coalesced": 0, "errors": 0}
+
+    async def recommend(self, profile, fast=None):
+        key = (profile["semester"], profile["cgpa"], tuple(sorted(set(profile["passed_courses"]))),
+               tuple(sorted(set(profile["failed_courses"]))), profile["total_credits"], profile["current_semester"],
+               fast)
+        future = self.in_flight.get(key)
+        if future is None:
+            self.stats["engine_runs"] += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, run_recommendation, profile, fast)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded, so a client that disconnects does not cancel the run other requests are waiting on
+        return await asyncio.shield(future)
+
+    async def handle(self, method, path, query, body):
+        """(status, JSON-serializable payload) for one request"""
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        if parts == ["health"]:
+            self.require(method, "GET")
+            return 200, {"status": "ok", "in_flight": len(self.in_flight), **self.stats}
+        if parts == ["recommend"]:
+            self.require(method, "POST")
+            data = self.parse_json(body)
+            profile = parse_profile(data)
+            try:
+                return 200, await self.recommend(profile, parse_fast(data))
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        if parts == ["batch"]:
+            self.require(method, "POST")
+            return 200, {"results": await self.advise(self.parse_json(body))}
+        if parts and parts[0] == "courses" and len(parts) <= 2:
+            self.require(method, "GET")
+            category = query.get("category", [None])[0]
+            if category is not None and category not in CSV_FILES:
+                raise HTTPError(404, f"Unknown category {category}.")
+            # Reloading after a catalog change reads files, so keep it off the event loop
+            catalog = await asyncio.get_running_loop().run_in_executor(None, get_catalog)
+            if len(parts) == 2:
+                record = catalog.get(parts[1], category)
+                if record is None:
+                    raise HTTPError(404, f"Course {parts[1]} not found.")
+                return 200, course_json(record)
+            category = category or "Core"
+            try:
+                return 200, {"category": category, "courses": [course_json(record)
+                                                               for record in catalog.courses(category)]}
+            except FileNotFoundError:
+                raise HTTPError(404, f"{CSV_FILES[category]} not found.")
+        raise HTTPError(404, f"No route for {path}.")
+
+    async def advise(self, data):
+        """Batch advising, one result per student in batch.advise_student's format
+
+        The body lists either students, each with the recommend fields plus id and name, or ids to look
+        up in the student directory, whose registered courses count as passed as in batch.py.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("students", data.get("ids")), list):
+            raise HTTPError(400, 'Expected {"students": [...]} or {"ids": [...]}.')
+        fast = parse_fast(data)
+        if "students" in data:
+            return await asyncio.gather(*(self.advise_one(entry, fast) for entry in data["students"]))
+        loop = asyncio.get_running_loop()
+        runs = []
+        for student_id in data["ids"]:
+            try:
+                student = await loop.run_in_executor(None, students.get_student, student_id)
+            except (FileNotFoundError, ValueError, TypeError):
+                student = None
+            if student is None:
+                result = advice_result(student_id)
+                result["error"] = f"Student {student_id} not found."
+                runs.append(asyncio.sleep(0, result))
+            else:
+                runs.append(self.advise_one(directory_student(student), fast))
+        return await asyncio.gather(*runs)
+
+    async def advise_one(self, entry, fast):
+        result = advice_result(None)
+        if isinstance(entry, dict):
+            result.update(id=entry.get("id"), name=entry.get("name", ""))
+        try:
+            profile = parse_profile(entry)  # Also rejects entries that are not objects
+            output = await self.recommend(profile, fast)
+            result.update(recommendations=[course["code"] for course in output["recommendations"]],
+                          elective_options=output["elective_options"], explanations=output["explanations"])
+        except (HTTPError, ValueError, TypeError, FileNotFoundError) as e:
+            result["error"] = str(e)
+        return result
+
+    @staticmethod
+    def require(method, allowed):
+        if method != allowed:
+            raise HTTPError(405, f"Use {allowed}.")
+
+    @staticmethod
+    def parse_json(body):
+        try:
+            return json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON.")
+
+    async def serve_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive; one request at a time per connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = await self.serve_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_request(self, request_line, reader, writer):
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self.respond(writer, 400, {"error": "Malformed request line."}, False)
+            return False
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        self.stats["requests"] += 1
+        try:
+            length = body_length(headers)
+        except HTTPError as e:
+            # Where this request's body ends is unknown, so the connection cannot carry another one
+            self.stats["errors"] += 1
+            self.respond(writer, e.status, {"error": str(e)}, False)
+            return False
+        try:
+            body = await reader.readexactly(length) if length else b""
+            url = urlsplit(target)
+            status, payload = await self.handle(method, url.path, parse_qs(url.query), body)
+        except HTTPError as e:
+            self.stats["errors"] += 1
+            status, payload = e.status, {"error": str(e)}
+        except FileNotFoundError as e:
+            self.stats["errors"] += 1
+            status, payload = 503, {"error": f"Catalog unavailable: {e}"}
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            status, payload = 500, {"error": f"An unexpected error occurred: {e}"}
+        self.respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write((f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                      f"Content-Type: application/json\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1") + body)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=None, ready=None):
+    """Run the service until cancelled; ready, if given, is set once it accepts connections"""
+    service = RecommendationService(workers)
+    try:
+        # Stop cleanly on SIGTERM too, so the worker processes are shut down with the service
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # Not on Windows
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    try:
+        async with server:
+            if ready is not None:
+                ready.set()
+            print(f"Serving on http://{host}:{port}", flush=True)
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON service for recommendations, catalog lookups and "
+                                                 "batch advising.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Engine worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import pandas as pd
+
+from storage import atomic_file
+
+# The compiled catalog, kept next to the category files; the CSVs stay the source of truth
+SNAPSHOT_FILE = "catalog.snapshot"
+
+# Bump when CourseCatalog, CompiledCatalog, the record types or the prerequisite graph change shape
+SNAPSHOT_FORMAT = 4
+
+def snapshot_key(signature):
+    """What a snapshot must have been built from to be reused: this format, this Python and pandas, these files"""
+    return (SNAPSHOT_FORMAT, sys.version_info[:2], pd.__version__, signature)
+
+def read_snapshot(signature, path=SNAPSHOT_FILE):
+    """The CompiledCatalog stored for these catalog files, or None when the snapshot is missing or stale
+
+    Snapshots are pickles, so only load ones this application wrote.
+    """
+    try:
+        with open(path, "rb") as f:
+            # The key is pickled on its own, so a stale snapshot is rejected without loading the catalog
+            if pickle.load(f) != snapshot_key(signature):
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Torn, truncated or written by incompatible code: rebuild from the CSVs
+        return None
+
+def write_snapshot(compiled, signature, path=SNAPSHOT_FILE):
+    compiled.catalog.prerequisite_graph()  # Stored with the catalog
+    with atomic_file(path, "wb") as f:
+        pickle.dump(snapshot_key(signature), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Compile the category files into {SNAPSHOT_FILE}.")
+    parser.add_argument("--check", action="store_true", help="Only report whether the snapshot is up to date")
+    args = parser.parse_args(argv)
+
+    # catalog imports this module to read snapshots
+    from catalog import catalog_signature, get_catalog, reload_catalog, save_snapshot
+    signature = catalog_signature()
+    start = time.perf_counter()
+    compiled = read_snapshot(signature)
+    if args.check:
+        print(f"{SNAPSHOT_FILE} is {'up to date' if compiled else 'missing or stale'}")
+        return 0 if compiled else 1
+    if compiled is not None:
+        print(f"{SNAPSHOT_FILE} is up to date; loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return 0
+
+    import inference  # Compiling needs the rule engine
+    reload_catalog()
+    start = time.perf_counter()
+    compiled = inference.CompiledCatalog(get_catalog())
+    save_snapshot(compiled)
+    print(f"Compiled {len(compiled.course_facts)} courses in {(time.perf_counter() - start) * 1000:.0f} ms; "
+          f"wrote {SNAPSHOT_FILE} ({os.path.getsize(SNAPSHOT_FILE) / 2 ** 10:.0f} KB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
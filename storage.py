@@ -0,0 +1,136 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# One lock per file within this process; the OS lock covers other processes
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_held = threading.local()
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on a data file, held through a sidecar .lock file; re-entrant within a thread"""
+    path = os.path.abspath(path)
+    held = _held.__dict__.setdefault("paths", set())
+    if path in held:
+        yield
+        return
+    with _thread_lock(path):
+        with open(path + ".lock", "a+") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            held.add(path)
+            try:
+                yield
+            finally:
+                held.discard(path)
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def read_header(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), None)
+
+def read_rows(path):
+    """Header and rows of a CSV file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+def line_terminator(path):
+    """The line ending a CSV already uses, so rewrites and appends keep it"""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            first_line = f.readline()
+        if first_line.endswith(b"\n") and not first_line.endswith(b"\r\n"):
+            return "\n"
+    return "\r\n"
+
+@contextmanager
+def atomic_file(path, mode='w', **kwargs):
+    """A temp file in path's directory that replaces path once the block completes, so readers never see a
+    partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def atomic_write_rows(path, fieldnames, rows):
+    """Rewrite a CSV through a temp file in the same directory"""
+    terminator = line_terminator(path)
+    with atomic_file(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore', lineterminator=terminator)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def append_row(path, fieldnames, row):
+    """Append one row to a CSV, writing the header first if the file is new"""
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    terminator = line_terminator(path)
+    missing_newline = False
+    if not new_file:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            missing_newline = f.read(1) not in (b"\n", b"\r")
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        if missing_newline:
+            f.write(terminator)
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore', lineterminator=terminator)
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+
+def journal_path(path):
+    return path + ".journal"
+
+def append_journal(path, entry):
+    """Record an edit or delete for a CSV without rewriting it"""
+    with open(journal_path(path), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(path):
+    """Journal entries for a CSV, oldest first; a torn last line from a crash is ignored"""
+    if not os.path.exists(journal_path(path)):
+        return []
+    entries = []
+    with open(journal_path(path), encoding='utf-8') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+def clear_journal(path):
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
-from inference import recommend_courses
+from catalog import get_catalog
+from inference import RecommendationSession
 
 def student_ui():
     st.header("Enter Your Information")
@@ -11,22 +11,15 @@ def student_ui():
     current_semester = st.selectbox("Current Semester", ["Fall", "Spring"])
 
     # Load main courses
+    catalog = get_catalog()
     try:
-        courses = pd.read_csv("courses1.csv")
+        core_codes = catalog.codes("Core")
     except FileNotFoundError:
         st.error("courses1.csv not found. Please ensure the file exists.")
         return
 
-    # Define elective course files
-    elective_files = {
-        "E1": "E1.csv",
-        "E2": "Elective E2 Courses1.csv",
-        "E3": "Elective E3 Courses1.csv",
-        "E4": "E4.csv",
-        "E5": "E5.csv",
-        "E6": "Elective E6 Courses1.csv",
-        "University Elective": "Elective University Courses1.csv"
-    }
+    # Elective course categories
+    elective_categories = ["E1", "E2", "E3", "E4", "E5", "E6", "University Elective"]
 
     # Load elective courses based on semester and season
     elective_selections = {}
@@ -34,14 +27,14 @@ def student_ui():
     passed_elective_selections = {}
     if semester == 4 and current_semester == "Fall":
         try:
-            e1_df = pd.read_csv(elective_files["E1"])
+            e1_codes = catalog.codes("E1")
             elective_selections["Elective Course E1"] = st.multiselect(
-                "Elective Course E1", options=e1_df["CourseCode"].tolist(), key="e1_select"
+                "Elective Course E1", options=e1_codes, key="e1_select"
             )
             failed_elective_selections["Failed Elective Course E1"] = st.multiselect(
-                "Failed Elective Course E1", options=e1_df["CourseCode"].tolist(), key="e1_failed_select"
+                "Failed Elective Course E1", options=e1_codes, key="e1_failed_select"
             )
-            available_passed_e1 = list(set(e1_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E1"]))
+            available_passed_e1 = list(set(e1_codes) - set(failed_elective_selections["Failed Elective Course E1"]))
             passed_elective_selections["Passed Elective Course E1"] = st.multiselect(
                 "Passed Elective Course E1", options=available_passed_e1, key="e1_passed_select"
             )
@@ -49,14 +42,14 @@ def student_ui():
             st.error("E1.csv not found. Please ensure the file exists.")
     elif semester == 5 and current_semester == "Spring":
         try:
-            e2_df = pd.read_csv(elective_files["E2"])
+            e2_codes = catalog.codes("E2")
             elective_selections["Elective Course E2"] = st.multiselect(
-                "Elective Course E2", options=e2_df["CourseCode"].tolist(), key="e2_select"
+                "Elective Course E2", options=e2_codes, key="e2_select"
             )
             failed_elective_selections["Failed Elective Course E2"] = st.multiselect(
-                "Failed Elective Course E2", options=e2_df["CourseCode"].tolist(), key="e2_failed_select"
+                "Failed Elective Course E2", options=e2_codes, key="e2_failed_select"
             )
-            available_passed_e2 = list(set(e2_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E2"]))
+            available_passed_e2 = list(set(e2_codes) - set(failed_elective_selections["Failed Elective Course E2"]))
             passed_elective_selections["Passed Elective Course E2"] = st.multiselect(
                 "Passed Elective Course E2", options=available_passed_e2, key="e2_passed_select"
             )
@@ -64,14 +57,14 @@ def student_ui():
             st.error("Elective E2 Courses1.csv not found. Please ensure the file exists.")
     elif semester == 5 and current_semester == "Fall":
         try:
-            uni_df = pd.read_csv(elective_files["University Elective"])
+            uni_codes = catalog.codes("University Elective")
             elective_selections["Elective University"] = st.multiselect(
-                "Elective University", options=uni_df["CourseCode"].tolist(), key="uni_select_5"
+                "Elective University", options=uni_codes, key="uni_select_5"
             )
             failed_elective_selections["Failed Elective University"] = st.multiselect(
-                "Failed Elective University", options=uni_df["CourseCode"].tolist(), key="uni_failed_select_5"
+                "Failed Elective University", options=uni_codes, key="uni_failed_select_5"
             )
-            available_passed_uni = list(set(uni_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective University"]))
+            available_passed_uni = list(set(uni_codes) - set(failed_elective_selections["Failed Elective University"]))
             passed_elective_selections["Passed Elective University"] = st.multiselect(
                 "Passed Elective University", options=available_passed_uni, key="uni_passed_select_5"
             )
@@ -79,14 +72,14 @@ def student_ui():
             st.error("Elective University Courses1.csv not found. Please ensure the file exists.")
     elif semester == 7 and current_semester == "Fall":
         try:
-            uni_df = pd.read_csv(elective_files["University Elective"])
+            uni_codes = catalog.codes("University Elective")
             elective_selections["Elective University"] = st.multiselect(
-                "Elective University", options=uni_df["CourseCode"].tolist(), key="uni_select_7"
+                "Elective University", options=uni_codes, key="uni_select_7"
             )
             failed_elective_selections["Failed Elective University"] = st.multiselect(
-                "Failed Elective University", options=uni_df["CourseCode"].tolist(), key="uni_failed_select_7"
+                "Failed Elective University", options=uni_codes, key="uni_failed_select_7"
             )
-            available_passed_uni = list(set(uni_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective University"]))
+            available_passed_uni = list(set(uni_codes) - set(failed_elective_selections["Failed Elective University"]))
             passed_elective_selections["Passed Elective University"] = st.multiselect(
                 "Passed Elective University", options=available_passed_uni, key="uni_passed_select_7"
             )
@@ -94,25 +87,25 @@ def student_ui():
             st.error("Elective University Courses1.csv not found. Please ensure the file exists.")
     elif semester == 9 and current_semester == "Fall":
         try:
-            e3_df = pd.read_csv(elective_files["E3"])
-            e4_df = pd.read_csv(elective_files["E4"])
+            e3_codes = catalog.codes("E3")
+            e4_codes = catalog.codes("E4")
             elective_selections["Elective Course E3"] = st.multiselect(
-                "Elective Course E3", options=e3_df["CourseCode"].tolist(), key="e3_select"
+                "Elective Course E3", options=e3_codes, key="e3_select"
             )
             failed_elective_selections["Failed Elective Course E3"] = st.multiselect(
-                "Failed Elective Course E3", options=e3_df["CourseCode"].tolist(), key="e3_failed_select"
+                "Failed Elective Course E3", options=e3_codes, key="e3_failed_select"
             )
-            available_passed_e3 = list(set(e3_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E3"]))
+            available_passed_e3 = list(set(e3_codes) - set(failed_elective_selections["Failed Elective Course E3"]))
             passed_elective_selections["Passed Elective Course E3"] = st.multiselect(
                 "Passed Elective Course E3", options=available_passed_e3, key="e3_passed_select"
             )
             elective_selections["Elective Course E4"] = st.multiselect(
-                "Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_select"
+                "Elective Course E4", options=e4_codes, key="e4_select"
             )
             failed_elective_selections["Failed Elective Course E4"] = st.multiselect(
-                "Failed Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_failed_select"
+                "Failed Elective Course E4", options=e4_codes, key="e4_failed_select"
             )
-            available_passed_e4 = list(set(e4_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E4"]))
+            available_passed_e4 = list(set(e4_codes) - set(failed_elective_selections["Failed Elective Course E4"]))
             passed_elective_selections["Passed Elective Course E4"] = st.multiselect(
                 "Passed Elective Course E4", options=available_passed_e4, key="e4_passed_select"
             )
@@ -120,25 +113,25 @@ def student_ui():
             st.error(f"{str(e).split(': ')[1]} not found. Please ensure the file exists.")
     elif semester == 10:
         try:
-            e4_df = pd.read_csv(elective_files["E4"])
-            e6_df = pd.read_csv(elective_files["E6"])
+            e4_codes = catalog.codes("E4")
+            e6_codes = catalog.codes("E6")
             elective_selections["Elective Course E4"] = st.multiselect(
-                "Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_select_10"
+                "Elective Course E4", options=e4_codes, key="e4_select_10"
             )
             failed_elective_selections["Failed Elective Course E4"] = st.multiselect(
-                "Failed Elective Course E4", options=e4_df["CourseCode"].tolist(), key="e4_failed_select_10"
+                "Failed Elective Course E4", options=e4_codes, key="e4_failed_select_10"
             )
-            available_passed_e4 = list(set(e4_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E4"]))
+            available_passed_e4 = list(set(e4_codes) - set(failed_elective_selections["Failed Elective Course E4"]))
             passed_elective_selections["Passed Elective Course E4"] = st.multiselect(
                 "Passed Elective Course E4", options=available_passed_e4, key="e4_passed_select_10"
             )
             elective_selections["Elective Course E6"] = st.multiselect(
-                "Elective Course E6", options=e6_df["CourseCode"].tolist(), key="e6_select"
+                "Elective Course E6", options=e6_codes, key="e6_select"
             )
             failed_elective_selections["Failed Elective Course E6"] = st.multiselect(
-                "Failed Elective Course E6", options=e6_df["CourseCode"].tolist(), key="e6_failed_select"
+                "Failed Elective Course E6", options=e6_codes, key="e6_failed_select"
             )
-            available_passed_e6 = list(set(e6_df["CourseCode"].tolist()) - set(failed_elective_selections["Failed Elective Course E6"]))
+            available_passed_e6 = list(set(e6_codes) - set(failed_elective_selections["Failed Elective Course E6"]))
             passed_elective_selections["Passed Elective Course E6"] = st.multiselect(
                 "Passed Elective Course E6", options=available_passed_e6, key="e6_passed_select"
             )
@@ -146,11 +139,10 @@ def student_ui():
             st.error(f"{str(e).split(': ')[1]} not found. Please ensure the file exists.")
 
     # Load all courses for failed/passed selection
-    all_courses = courses["CourseCode"].tolist()
-    for cat, file_path in elective_files.items():
+    all_courses = list(core_codes)
+    for cat in elective_categories:
         try:
-            df = pd.read_csv(file_path)
-            all_courses.extend(df["CourseCode"].tolist())
+            all_courses.extend(catalog.codes(cat))
         except FileNotFoundError:
             continue
 
@@ -174,8 +166,11 @@ def student_ui():
         for passed_label, passed_codes in passed_elective_selections.items():
             passed_electives.extend(passed_codes)
 
-        # Pass all selected courses to the recommender
-        recs, elective_opts, exps = recommend_courses(
+        # Pass all selected courses to the recommender; the session re-fires only what a changed selection affects
+        if "recommendation_session" not in st.session_state:
+            # The fast engine is the one that updates incrementally; its results match experta's
+            st.session_state.recommendation_session = RecommendationSession(fast=True)
+        recs, elective_opts, exps = st.session_state.recommendation_session.recommend(
             semester=semester,
             cgpa=cgpa,
             passed_courses=passed_courses + passed_electives,  # Include passed electives
@@ -187,7 +182,14 @@ def student_ui():
         st.subheader("Recommended Courses")
         if recs:
             for i, course in enumerate(recs):
-                st.write(f"{i}: {course}")
+                st.write(f"{i}: {course['code']} - {course['name']} ({course['credit_hours']:g} credit hours): {course['reason']}")
+        else:
+            st.write("[]")
+
+        st.subheader("Elective Options")
+        if elective_opts:
+            for code, options in elective_opts.items():
+                st.write(f"{code}: {', '.join(options) if options else 'No eligible courses'}")
         else:
             st.write("[]")
 
@@ -199,18 +201,7 @@ def student_ui():
             st.write("[]")
 
         st.subheader("Total Recommended Credit Hours")
-        total_hours = sum(courses[courses["CourseCode"] == code]["CreditHours"].iloc[0]
-                          for code in recs
-                          if code in courses["CourseCode"].values)
-        for cat, file_path in elective_files.items():
-            try:
-                df = pd.read_csv(file_path)
-                total_hours += sum(df[df["CourseCode"] == code]["CreditHours"].iloc[0]
-                                   for code in recs
-                                   if code in df["CourseCode"].values)
-            except FileNotFoundError:
-                continue
-        st.write(total_hours)
+        st.write(f"{sum(course['credit_hours'] for course in recs):g}")
 
 if __name__ == "__main__":
     st.title("AIU Course Registration System")
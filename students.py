@@ -0,0 +1,70 @@
+import csv
+import os
+import threading
+
+import database
+from catalog import file_signature
+from records import intern_code
+
+STUDENTS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "students.csv")
+
+def parse_registered_courses(value):
+    """Split a semicolon-separated registered_courses cell into interned course codes"""
+    return [intern_code(code.strip()) for code in (value or "").split(";") if code.strip()]
+
+def to_number(value, cast):
+    try:
+        return cast(float(value)) if cast is int else cast(value)
+    except (ValueError, TypeError):
+        return None
+
+def to_student(row):
+    """Typed student record from a students.csv row or a students table row"""
+    return {
+        "id": int(row["id"]),
+        "name": row.get("name") or "",
+        "semester": to_number(row.get("semester"), int),
+        "current_semester": intern_code(row.get("current_semester") or ""),
+        "year": to_number(row.get("year"), int),
+        "cgpa": to_number(row.get("cgpa"), float),
+        "total_credits": to_number(row.get("total_credits"), int),
+        "registered_courses": parse_registered_courses(row.get("registered_courses"))
+    }
+
+class StudentDirectory:
+    """Every student in students.csv, keyed by id"""
+    def __init__(self, students):
+        self.by_id = {student["id"]: student for student in students}
+
+    def get(self, student_id):
+        return self.by_id.get(int(student_id))
+
+    def __len__(self):
+        return len(self.by_id)
+
+def load_directory(path=STUDENTS_CSV):
+    with open(path, newline='', encoding='utf-8') as f:
+        return StudentDirectory(to_student(row) for row in csv.DictReader(f) if row.get("id"))
+
+_directory = None
+_directory_signature = None
+_directory_lock = threading.Lock()
+
+def get_directory(path=STUDENTS_CSV):
+    """The shared student directory, reloaded when students.csv changes on disk"""
+    global _directory, _directory_signature
+    signature = (path, file_signature(path))
+    if signature[1] is None:
+        raise FileNotFoundError(f"[Errno 2] No such file or directory: '{path}'")
+    with _directory_lock:
+        if _directory is None or signature != _directory_signature:
+            _directory = load_directory(path)
+            _directory_signature = signature
+        return _directory
+
+def get_student(student_id):
+    """A student's record by id from the configured store, or None"""
+    if database.db_path():
+        row = database.get_student(int(student_id))
+        return to_student(row) if row else None
+    return get_directory().get(student_id)
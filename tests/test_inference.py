@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+import inference
+from catalog import CSV_FILES, DB_ENV_VAR, catalog_signature, get_catalog, reload_catalog
+from differential import compare, generate_profiles
+from inference import get_compiled_catalog, is_elective, recommend_course_details
+from snapshot import SNAPSHOT_FILE, read_snapshot
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def compile_and_snapshot():
+    """Compile the current catalog and wait for the background thread that snapshots it"""
+    compiled = get_compiled_catalog()
+    if inference._snapshot_thread is not None:
+        inference._snapshot_thread.join()
+    return compiled
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """The compiled catalog of the repository's own category files"""
+    monkeypatch.delenv(DB_ENV_VAR, raising=False)
+    monkeypatch.chdir(REPO)
+    reload_catalog()
+    yield get_compiled_catalog()
+    reload_catalog()
+
+def test_slots_are_not_their_own_options(compiled):
+    slots = {record.code for record in compiled.catalog.courses("Core") if is_elective(record.category)}
+    assert slots, "courses1.csv lists no elective slots"
+    for cat, (_, options) in compiled.elective_index.items():
+        assert not slots & {code for _, code, _ in options}, f"{cat} offers a slot as an option"
+
+    codes = sorted(compiled.course_codes | slots)
+    offered = 0
+    for profile in generate_profiles(codes, 200, seed=1):
+        _, elective_opts, exps = recommend_course_details(**profile, fast=True)
+        for slot, options in elective_opts.items():
+            offered += bool(options)
+            assert slot not in options
+            assert not slots & set(options)
+    assert offered, "no profile was offered elective options"
+
+def test_fast_engine_matches_experta(compiled):
+    mismatches, _ = compare(150, seed=7)
+    assert not mismatches, f"{len(mismatches)} of 150 profiles differ, first {mismatches[0][0]}"
+
+def test_reload_skips_a_stale_snapshot(tmp_path, monkeypatch):
+    """A rewrite keeping the file's mtime and size matches the snapshot's signature; a forced reload still sees it"""
+    monkeypatch.delenv(DB_ENV_VAR, raising=False)
+    core = CSV_FILES["Core"]
+    shutil.copy(os.path.join(REPO, core), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    reload_catalog()
+    compile_and_snapshot()
+    assert os.path.exists(SNAPSHOT_FILE)
+
+    code = get_catalog().codes("Core")[0]
+    stat = os.stat(core)
+    with open(core, encoding="utf-8", newline="") as f:
+        text = f.read()
+    name = get_catalog().get(code, "Core").name
+    renamed = "X" * len(name)
+    with open(core, "w", encoding="utf-8", newline="") as f:
+        f.write(text.replace(name, renamed, 1))
+    os.utime(core, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(core).st_size == stat.st_size
+
+    reload_catalog()
+    assert get_catalog().get(code, "Core").name == renamed
+    compile_and_snapshot()  # Rewrites the snapshot from the re-read files
+    assert read_snapshot(catalog_signature()).catalog.get(code, "Core").name == renamed
+    reload_catalog()
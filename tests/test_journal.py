@@ -0,0 +1,176 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import editor
+from catalog import CSV_FILES, DB_ENV_VAR, get_catalog, reload_catalog
+from storage import journal_path, read_rows
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE = CSV_FILES["Core"]
+
+def wait_for_background_writes(timeout=30):
+    """Let the compaction and snapshot threads editor started finish before the directory goes away"""
+    deadline = time.monotonic() + timeout
+    while editor._compacting or editor._snapshot_running:
+        assert time.monotonic() < deadline, "background writes did not finish"
+        time.sleep(0.01)
+
+@pytest.fixture
+def catalog_dir(tmp_path, monkeypatch):
+    """A scratch copy of courses1.csv as the working directory, with the CSV store"""
+    monkeypatch.delenv(DB_ENV_VAR, raising=False)
+    shutil.copy(os.path.join(REPO, CORE), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    reload_catalog()
+    yield tmp_path
+    wait_for_background_writes()
+    editor.compact_pending()
+    reload_catalog()
+
+def core_codes(count):
+    return get_catalog().codes("Core")[:count]
+
+def edit_name(code, name):
+    assert editor.edit_course(code, name, "", "", "", 3, "Fall", 1, "Core") == f"{code} successfully updated."
+
+def file_names():
+    """Course names as written in courses1.csv, after checking no journal is left"""
+    assert not os.path.exists(journal_path(CORE))
+    _, rows = read_rows(CORE)
+    codes = [row["CourseCode"] for row in rows]
+    assert len(codes) == len(set(codes)), "a course was written twice"
+    return {row["CourseCode"]: row["CourseName"] for row in rows}
+
+def test_concurrent_edits_during_compaction(catalog_dir):
+    """Edits racing compactions, from threads here and from other processes, all reach the file"""
+    codes = core_codes(6)
+    stop = threading.Event()
+
+    def compact_repeatedly():
+        while not stop.is_set():
+            editor.compact_journal(CORE)
+
+    def edit_repeatedly(code):
+        for i in range(8):
+            edit_name(code, f"{code} thread edit {i}")
+
+    script = ("import sys, editor\n"
+              "for code in sys.argv[1:]:\n"
+              "    for i in range(8):\n"
+              "        editor.edit_course(code, f'{code} process edit {i}', '', '', '', 3, 'Fall', 1, 'Core')\n"
+              "editor.compact_pending()\n")
+    env = {**os.environ, "PYTHONPATH": REPO}
+    processes = [subprocess.Popen([sys.executable, "-c", script, code], env=env) for code in codes[4:]]
+    compactor = threading.Thread(target=compact_repeatedly)
+    editors = [threading.Thread(target=edit_repeatedly, args=(code,)) for code in codes[:4]]
+    compactor.start()
+    for thread in editors:
+        thread.start()
+    for thread in editors:
+        thread.join()
+    assert all(process.wait(timeout=120) == 0 for process in processes)
+    stop.set()
+    compactor.join()
+    wait_for_background_writes()
+    editor.compact_journal(CORE)
+
+    names = file_names()
+    for code in codes[:4]:
+        assert names[code] == f"{code} thread edit 7"
+    for code in codes[4:]:
+        assert names[code] == f"{code} process edit 7"
+    reload_catalog()
+    assert all(get_catalog().get(code, "Core").name == names[code] for code in codes)
+
+def test_edit_during_compaction_waits_and_lands(catalog_dir, monkeypatch):
+    """An edit made while a compaction holds the file goes into the next journal instead of being cleared"""
+    monkeypatch.setattr(editor, "schedule_compaction", lambda filename: None)  # Only the compactions below
+    code, other = core_codes(2)
+    clear_journal = editor.clear_journal
+    late_edit = threading.Thread(target=edit_name, args=(other, "Edited during compaction"))
+
+    def clear_after_late_edit(filename):
+        late_edit.start()
+        late_edit.join(0.3)
+        assert late_edit.is_alive(), "edit_course wrote while the compaction held the file lock"
+        clear_journal(filename)
+
+    edit_name(code, "Compacted")
+    monkeypatch.setattr(editor, "clear_journal", clear_after_late_edit)
+    editor.compact_journal(CORE)
+    monkeypatch.setattr(editor, "clear_journal", clear_journal)
+    late_edit.join()
+    assert os.path.exists(journal_path(CORE)), "the late edit was cleared with the compacted journal"
+    editor.compact_journal(CORE)
+
+    names = file_names()
+    assert names[code] == "Compacted"
+    assert names[other] == "Edited during compaction"
+
+def test_read_between_rewrite_and_clear(catalog_dir, monkeypatch):
+    """A catalog loaded after the rewrite but before the journal is cleared replays it without changing the result"""
+    monkeypatch.setattr(editor, "schedule_compaction", lambda filename: None)  # Keep every entry for one compaction
+    edited, deleted, re_added = core_codes(3)
+    expected_name = get_catalog().get(re_added, "Core").name
+    edit_name(edited, "First name")
+    assert editor.delete_course(deleted) == f"{deleted} successfully deleted."
+    assert editor.delete_course(re_added) == f"{re_added} successfully deleted."
+    # With a journal pending, adds are journaled too
+    assert editor.add_course(re_added, expected_name, "", "", "", 3, "Fall", 1, "Core") == \
+        f"{re_added} successfully added."
+    assert editor.add_course("NEW101", "New course", "", "", "", 3, "Fall", 1, "Core") == \
+        "NEW101 successfully added."
+    edit_name(edited, "Final name")
+
+    clear_journal = editor.clear_journal
+    seen = []
+
+    def read_before_clear(filename):
+        assert len(editor.read_journal(filename)) == 6
+        reload_catalog()
+        seen.append(get_catalog().frame("Core").copy())
+        clear_journal(filename)
+
+    monkeypatch.setattr(editor, "clear_journal", read_before_clear)
+    editor.compact_journal(CORE)
+    monkeypatch.setattr(editor, "clear_journal", clear_journal)
+
+    reload_catalog()
+    after = get_catalog().frame("Core")
+    for frame in seen + [after]:
+        codes = frame["CourseCode"].tolist()
+        assert len(codes) == len(set(codes)), "a journaled add was replayed twice"
+        names = dict(zip(frame["CourseCode"], frame["CourseName"]))
+        assert names[edited] == "Final name"
+        assert deleted not in names
+        assert names[re_added] == expected_name
+        assert names["NEW101"] == "New course"
+    assert seen, "the compaction did not reach clear_journal"
+    assert file_names() == dict(zip(after["CourseCode"], after["CourseName"]))
+
+def test_failed_compaction_is_logged_and_rescheduled(catalog_dir, monkeypatch, caplog):
+    """A compaction that raises is logged and frees its file, so the next write compacts the journal"""
+    code, other = core_codes(2)
+    compact_journal = editor.compact_journal
+
+    def fail(filename):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(editor, "compact_journal", fail)
+    edit_name(code, "Edited before the failure")
+    wait_for_background_writes()
+    assert os.path.exists(journal_path(CORE)), "the failed compaction cleared the journal"
+    assert "Compacting the journal of courses1.csv failed" in caplog.text
+
+    monkeypatch.setattr(editor, "compact_journal", compact_journal)
+    edit_name(other, "Edited after the failure")
+    wait_for_background_writes()
+    names = file_names()
+    assert names[code] == "Edited before the failure"
+    assert names[other] == "Edited after the failure"